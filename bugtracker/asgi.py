@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bugtracker.settings')
 
-application = get_asgi_application()
+
+class AsyncRoutesHandler(ASGIHandler):
+    """Resolves requests against bugtracker.urls_asgi, which adds native async views"""
+    urlconf = 'bugtracker.urls_asgi'
+
+    async def get_response_async(self, request):
+        request.urlconf = self.urlconf
+        return await super().get_response_async(request)
+
+
+# What get_asgi_application() does, with the handler above
+django.setup(set_prefix=False)
+application = AsyncRoutesHandler()
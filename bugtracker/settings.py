@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+import django
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,7 +58,7 @@ ROOT_URLCONF = 'bugtracker.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -74,12 +77,94 @@ WSGI_APPLICATION = 'bugtracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# DB_ENGINE selects sqlite (default) or postgresql; DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST and DB_PORT configure it. DB_CONN_MAX_AGE keeps
+# connections open between requests (seconds, 0 closes them per request).
+# DB_POOL=1 uses a psycopg connection pool instead on Django 5.1+, sized by
+# DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE. DB_REPLICA_HOST (or DB_REPLICA_NAME for
+# SQLite) adds a read replica that serves GET/HEAD requests.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# Applied to every new SQLite connection (see tasks/db.py); DB_SQLITE_TUNING=0
+# leaves SQLite's defaults alone.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB
+    'busy_timeout': 5000,  # ms
+}
+
+if DB_ENGINE == 'postgresql':
+    default_database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'bugtracker'),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if os.environ.get('DB_POOL') == '1' and django.VERSION >= (5, 1):
+        # A pool replaces persistent connections; Django rejects both at once
+        default_database['CONN_MAX_AGE'] = 0
+        default_database['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        }
+    replica_overrides = {'HOST': os.environ.get('DB_REPLICA_HOST')}
+else:
+    default_database = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'PRAGMAS': SQLITE_PRAGMAS if os.environ.get('DB_SQLITE_TUNING', '1') == '1' else {},
     }
-}
+    replica_overrides = {'NAME': os.environ.get('DB_REPLICA_NAME')}
+
+DATABASES = {'default': default_database}
+
+if any(replica_overrides.values()):
+    DATABASES['replica'] = {**default_database, **replica_overrides, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_ROUTERS = ['tasks.db.ReadReplicaRouter']
+    MIDDLEWARE.insert(0, 'tasks.db.ReplicaRoutingMiddleware')
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# CACHE_BACKEND selects locmem (default), file or redis; CACHE_LOCATION
+# overrides the directory or URL.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+elif CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bugtracker',
+        }
+    }
+
+# Seconds a cached read endpoint response may live before it is recomputed
+TASKS_CACHE_TIMEOUT = int(os.environ.get('TASKS_CACHE_TIMEOUT', 300))
 
 
 # Password validation
@@ -118,6 +203,32 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# REST API. The renderer and parser use orjson when it is installed and
+# fall back to the stdlib json module otherwise.
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'tasks.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'tasks.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Uploaded files (task attachments)
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Let the web server send attachment bytes: 'x-sendfile' (Apache, lighttpd)
+# or 'x-accel-redirect' (nginx, internal location at the prefix below).
+# Unset, Django streams them itself.
+ATTACHMENT_SENDFILE_MODE = os.environ.get('ATTACHMENT_SENDFILE_MODE') or None
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
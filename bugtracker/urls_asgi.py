@@ -0,0 +1,12 @@
+"""
+URL configuration for the ASGI application: the async views in
+tasks.urls_asgi take precedence over the routes in bugtracker.urls.
+"""
+from django.urls import path, include
+from tasks import urls_asgi
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('', include(urls_asgi.urlpatterns)),
+    path('api/', include(urls_asgi.api_urlpatterns)),
+] + wsgi_urlpatterns
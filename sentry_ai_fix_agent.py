@@ -1,14 +1,23 @@
 import os
 import sys
 import json
+import math
+import time
 import base64
+import hashlib
+import random
 import logging
+import sqlite3
 import requests
 import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from github import Github
 import google.generativeai as genai
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, Any
 
 # Configure logging
 logging.basicConfig(
@@ -22,18 +31,8 @@ logging.basicConfig(
 logger = logging.getLogger("sentry_agent")
 
 # Simple configuration helpers
-def save_last_run_time(file_path="last_run.txt"):
-    """Save the current time to a file"""
-    try:
-        with open(file_path, 'w') as f:
-            f.write(datetime.now().isoformat())
-        return True
-    except Exception as e:
-        logger.error(f"Error saving last run time: {e}")
-        return False
-
 def get_last_run_time(file_path="last_run.txt") -> Optional[datetime]:
-    """Get the last run time from file if it exists"""
+    """Get the last run time from the legacy last_run.txt file if it exists"""
     try:
         if os.path.exists(file_path):
             with open(file_path, 'r') as f:
@@ -44,6 +43,64 @@ def get_last_run_time(file_path="last_run.txt") -> Optional[datetime]:
         logger.error(f"Error reading last run time: {e}")
         return None
 
+class CheckpointStore:
+    """
+    Durable per-issue progress in a small SQLite file. Each issue's outcome
+    is committed as soon as it is known, so a crashed run resumes by
+    skipping the issues that were already fixed.
+    """
+    
+    def __init__(self, path: str = "agent_state.sqlite3"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS issues (
+                issue_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self.connection.commit()
+    
+    def close(self):
+        self.connection.close()
+    
+    def is_done(self, issue_id: str) -> bool:
+        row = self.connection.execute(
+            "SELECT status FROM issues WHERE issue_id = ?", (str(issue_id),)
+        ).fetchone()
+        return row is not None and row[0] == "done"
+    
+    def record(self, issue_id: str, success: bool):
+        """Record the outcome of one issue; failed issues are retried next run"""
+        with self.connection:
+            self.connection.execute(
+                """
+                INSERT INTO issues (issue_id, status, attempts, updated_at) VALUES (?, ?, 1, ?)
+                ON CONFLICT (issue_id) DO UPDATE SET
+                    status = excluded.status, attempts = attempts + 1, updated_at = excluded.updated_at
+                """,
+                (str(issue_id), "done" if success else "failed", datetime.now().isoformat()),
+            )
+    
+    def get_last_run_time(self) -> Optional[datetime]:
+        row = self.connection.execute("SELECT value FROM state WHERE key = 'last_run'").fetchone()
+        if row:
+            return datetime.fromisoformat(row[0])
+        # Carry over the watermark of agents that predate the store
+        return get_last_run_time()
+    
+    def save_last_run_time(self, started: datetime):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('last_run', ?)", (started.isoformat(),)
+            )
+
 def load_config(config_file=None) -> Dict:
     """Load configuration from environment variables and optional config file"""
     config = {}
@@ -61,8 +118,10 @@ def load_config(config_file=None) -> Dict:
     config['SENTRY_TOKEN'] = os.environ.get("SENTRY_TOKEN", config.get('SENTRY_TOKEN', ''))
     config['SENTRY_ORG'] = os.environ.get("SENTRY_ORG", config.get('SENTRY_ORG', ''))
     config['SENTRY_PROJECT'] = os.environ.get("SENTRY_PROJECT", config.get('SENTRY_PROJECT', ''))
+    config['SENTRY_URL'] = os.environ.get("SENTRY_URL", config.get('SENTRY_URL', 'https://sentry.io/api/0'))
     config['GITHUB_TOKEN'] = os.environ.get("GITHUB_TOKEN", config.get('GITHUB_TOKEN', ''))
     config['GITHUB_REPO'] = os.environ.get("GITHUB_REPO", config.get('GITHUB_REPO', ''))
+    config['GITHUB_CACHE_DIR'] = os.environ.get("GITHUB_CACHE_DIR", config.get('GITHUB_CACHE_DIR', '.cache/github-blobs'))
     config['GEMINI_API_KEY'] = os.environ.get("GEMINI_API_KEY", config.get('GEMINI_API_KEY', ''))
     
     return config
@@ -80,19 +139,162 @@ def validate_config(config: Dict) -> bool:
     
     return True
 
+class RequestMetrics:
+    """Thread-safe per-endpoint latency and outcome counters"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+    
+    def record(self, endpoint: str, seconds: float, status: Optional[int]):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if status is None or status >= 400:
+                self.failures[endpoint] = self.failures.get(endpoint, 0) + 1
+    
+    def record_retry(self, endpoint: str):
+        with self.lock:
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+    
+    def summary(self) -> Dict[str, Dict]:
+        with self.lock:
+            result = {}
+            for endpoint, samples in self.samples.items():
+                ordered = sorted(samples)
+                result[endpoint] = {
+                    "requests": len(ordered),
+                    "failures": self.failures.get(endpoint, 0),
+                    "retries": self.retries.get(endpoint, 0),
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1),
+                }
+            return result
+
 class SentryClient:
     """Client for interacting with the Sentry API"""
     
-    def __init__(self, config: Dict):
+    # 429 and 503 mean the request was not processed, so they are safe to
+    # retry for any method; the other gateway errors only for reads
+    RETRY_ANY_METHOD = {429, 503}
+    RETRY_SAFE_METHOD = {500, 502, 504}
+    
+    def __init__(self, config: Dict, timeout: Tuple[float, float] = (5, 30), max_retries: int = 5,
+                 backoff: float = 0.5, max_backoff: float = 60, pool_size: int = 10):
         self.config = config
-        self.base_url = "https://sentry.io/api/0"
+        self.base_url = config.get('SENTRY_URL') or "https://sentry.io/api/0"
         self.headers = {
             "Authorization": f"Bearer {config.get('SENTRY_TOKEN')}",
             "Content-Type": "application/json"
         }
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.metrics = RequestMetrics()
+        
+        # One pooled keep-alive session shared by all workers
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Set when Sentry reports the rate limit as exhausted; every worker
+        # waits for the window to reset instead of collecting 429s
+        self.rate_limit_lock = threading.Lock()
+        self.not_before = 0.0
     
-    def get_recent_issues(self, limit: int = 10, since: Optional[datetime] = None) -> List[Dict]:
-        """Fetch recent unresolved issues from Sentry without 'ai-fix-pr-raised' tag"""
+    def requested_delay(self, response: requests.Response) -> Optional[float]:
+        """Seconds Sentry asked us to wait, or None when it didn't say or the header is malformed"""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+            try:
+                return parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError, AttributeError):
+                return None
+        reset = response.headers.get("X-Sentry-Rate-Limit-Reset")
+        if reset and response.headers.get("X-Sentry-Rate-Limit-Remaining") == "0":
+            try:
+                return float(reset) - time.time()
+            except ValueError:
+                return None
+        return None
+    
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)"""
+        delay = self.requested_delay(response) if response is not None else None
+        if delay is not None and math.isfinite(delay):
+            return min(max(delay, 0), self.max_backoff)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+    
+    def note_rate_limit(self, response: requests.Response):
+        if response.headers.get("X-Sentry-Rate-Limit-Remaining") != "0":
+            return
+        try:
+            reset = float(response.headers.get("X-Sentry-Rate-Limit-Reset", ""))
+        except ValueError:
+            return
+        with self.rate_limit_lock:
+            self.not_before = max(self.not_before, min(reset, time.time() + self.max_backoff))
+    
+    def wait_for_rate_limit(self):
+        with self.rate_limit_lock:
+            delay = self.not_before - time.time()
+        if delay > 0:
+            logger.info(f"Sentry rate limit exhausted, waiting {delay:.1f}s")
+            time.sleep(delay)
+    
+    def request(self, method: str, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request on the pooled session, retrying connection errors,
+        429s and transient 5xx responses with backoff. `endpoint` names the
+        call in the latency metrics. The final response is returned as is.
+        """
+        safe = method.upper() == "GET"
+        for attempt in range(self.max_retries + 1):
+            self.wait_for_rate_limit()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.metrics.record(endpoint, time.perf_counter() - started, None)
+                # Without a response a POST may have been applied; only
+                # retry it when the connection was never made
+                retryable = safe or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self.retry_delay(attempt)
+                logger.warning(f"{endpoint}: {e}; retrying in {delay:.1f}s")
+            else:
+                self.metrics.record(endpoint, time.perf_counter() - started, response.status_code)
+                self.note_rate_limit(response)
+                status = response.status_code
+                retryable = status in self.RETRY_ANY_METHOD or (safe and status in self.RETRY_SAFE_METHOD)
+                if not retryable or attempt == self.max_retries:
+                    return response
+                delay = self.retry_delay(attempt, response)
+                logger.warning(f"{endpoint}: HTTP {status}; retrying in {delay:.1f}s")
+            self.metrics.record_retry(endpoint)
+            time.sleep(delay)
+    
+    def close(self):
+        self.session.close()
+    
+    def iter_issues(self, limit: Optional[int] = None, since: Optional[datetime] = None,
+                    page_size: int = 100) -> Iterator[Dict]:
+        """
+        Yield unresolved issues without the 'ai-fix-pr-raised' tag page by
+        page, following Sentry's Link cursor headers until `limit` issues
+        have been yielded or there are no more results.
+        """
         url = f"{self.base_url}/projects/{self.config.get('SENTRY_ORG')}/{self.config.get('SENTRY_PROJECT')}/issues/"
         
         # Only fetch issues that don't have our AI fix tag
@@ -100,7 +302,7 @@ class SentryClient:
         
         params = {
             "query": query,
-            "limit": limit
+            "limit": min(page_size, limit) if limit else page_size
         }
         
         # Add time filter if 'since' is provided
@@ -110,18 +312,34 @@ class SentryClient:
         
         logger.info(f"Fetching issues from Sentry with params: {params}")
         
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
+        yielded = 0
+        while url:
+            try:
+                response = self.request("GET", "list_issues", url, params=params)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error fetching issues from Sentry: {e}")
+                if hasattr(e, 'response') and e.response:
+                    logger.error(f"Response status: {e.response.status_code}")
+                    logger.error(f"Response body: {e.response.text}")
+                raise
+            
             issues = response.json()
-            logger.info(f"Fetched {len(issues)} issues from Sentry")
-            return issues
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching issues from Sentry: {e}")
-            if hasattr(e, 'response') and e.response:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response body: {e.response.text}")
-            raise
+            logger.info(f"Fetched a page of {len(issues)} issues from Sentry")
+            for issue in issues:
+                yield issue
+                yielded += 1
+                if limit and yielded >= limit:
+                    return
+            
+            # Link: <...>; rel="next"; results="true"; cursor="..."
+            next_link = response.links.get("next", {})
+            url = next_link.get("url") if next_link.get("results") == "true" else None
+            params = None  # the cursor URL carries the query
+    
+    def get_recent_issues(self, limit: int = 10, since: Optional[datetime] = None) -> List[Dict]:
+        """Fetch recent unresolved issues from Sentry without 'ai-fix-pr-raised' tag"""
+        return list(self.iter_issues(limit=limit, since=since))
     
     def get_issue_details(self, issue_id: str) -> Dict:
         """Get detailed information about a specific issue"""
@@ -129,7 +347,7 @@ class SentryClient:
         
         try:
             logger.info(f"Fetching details for issue {issue_id}")
-            response = requests.get(url, headers=self.headers)
+            response = self.request("GET", "latest_event", url)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -149,7 +367,7 @@ class SentryClient:
         
         try:
             logger.info(f"Adding comment to issue {issue_id}")
-            response = requests.post(url, headers=self.headers, json=data)
+            response = self.request("POST", "add_comment", url, json=data)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -170,7 +388,7 @@ class SentryClient:
         
         try:
             logger.info(f"Adding tag {tag_name}:{tag_value} to issue {issue_id}")
-            response = requests.post(url, headers=self.headers, json=data)
+            response = self.request("POST", "add_tag", url, json=data)
             
             if response.status_code == 204:  # No content response
                 logger.info(f"Successfully added tag to issue {issue_id}")
@@ -185,46 +403,143 @@ class SentryClient:
                 logger.error(f"Response body: {e.response.text}")
             return False
 
+def git_blob_sha(data: bytes) -> str:
+    """The SHA git (and the GitHub API) uses for a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+class BlobCache:
+    """On-disk content-addressed store of file contents keyed by git blob SHA"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def path(self, sha: str) -> str:
+        return os.path.join(self.directory, sha[:2], sha[2:])
+    
+    def get(self, sha: str) -> Optional[bytes]:
+        try:
+            with open(self.path(sha), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # A blob whose content doesn't hash to its name is corrupt; refetch it
+        return data if git_blob_sha(data) == sha else None
+    
+    def put(self, sha: str, data: bytes):
+        path = self.path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial blob
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
 class GitHubClient:
-    """Client for interacting with the GitHub API"""
+    """
+    Client for interacting with the GitHub API.
+    
+    File lookups are served from a snapshot of the default branch: the
+    recursive tree is fetched once per run and blobs come from an on-disk
+    cache keyed by SHA, so a file costs one API call the first time it is
+    ever seen and none afterwards.
+    """
     
     def __init__(self, config: Dict):
         self.config = config
         self.client = Github(config.get('GITHUB_TOKEN'))
-        self.repo = self.client.get_repo(config.get('GITHUB_REPO'))
+        self.blob_cache = BlobCache(config.get('GITHUB_CACHE_DIR') or '.cache/github-blobs')
+        self.api_calls = 0
+        self.lock = threading.Lock()
+        self._repo = None
+        self._snapshot = None
+    
+    def count_call(self, calls: int = 1):
+        with self.lock:
+            self.api_calls += calls
+    
+    @property
+    def repo(self):
+        """The repository, resolved on first use"""
+        with self.lock:
+            if self._repo is None:
+                self._repo = self.client.get_repo(self.config.get('GITHUB_REPO'))
+                self.api_calls += 1
+            return self._repo
+    
+    def get_snapshot(self) -> Dict:
+        """Commit SHA and path -> blob SHA map of the default branch, fetched once"""
+        repo = self.repo
+        with self.lock:
+            if self._snapshot is None:
+                branch = repo.get_branch(repo.default_branch)
+                tree = repo.get_git_tree(branch.commit.sha, recursive=True)
+                self.api_calls += 2
+                self._snapshot = {
+                    'commit': branch.commit.sha,
+                    'blobs': {element.path: element.sha for element in tree.tree if element.type == 'blob'},
+                    'truncated': tree.raw_data.get('truncated', False),
+                }
+                logger.info(f"Loaded snapshot of {repo.default_branch} at {branch.commit.sha[:12]} "
+                            f"({len(self._snapshot['blobs'])} files)")
+            return self._snapshot
     
     def get_file_content(self, file_path: str) -> Tuple[Optional[str], Optional[str]]:
         """Get the content of a file from GitHub"""
         try:
             logger.info(f"Fetching content for file {file_path}")
-            file_content = self.repo.get_contents(file_path)
-            content = base64.b64decode(file_content.content).decode('utf-8')
-            return content, file_content.sha
+            snapshot = self.get_snapshot()
+            sha = snapshot['blobs'].get(file_path)
+            if sha is None:
+                if not snapshot['truncated']:
+                    logger.error(f"Error getting file content: {file_path} is not in the repository")
+                    return None, None
+                # Very large trees come back truncated; ask for the file directly
+                self.count_call()
+                file_content = self.repo.get_contents(file_path, ref=snapshot['commit'])
+                return base64.b64decode(file_content.content).decode('utf-8'), file_content.sha
+            
+            data = self.blob_cache.get(sha)
+            if data is None:
+                self.count_call()
+                data = base64.b64decode(self.repo.get_git_blob(sha).content)
+                self.blob_cache.put(sha, data)
+            return data.decode('utf-8'), sha
         except Exception as e:
             logger.error(f"Error getting file content: {e}")
             return None, None
     
     def create_pull_request(self, file_path: str, content_sha: str, fixed_code: str, 
-                           issue_details: Dict, explanation: str) -> str:
-        """Create a GitHub PR with the fix"""
+                           issue_details: Union[Dict, List[Dict]], explanation: str) -> str:
+        """Create a GitHub PR with the fix for one issue or several in the same file"""
+        issues = issue_details if isinstance(issue_details, list) else [issue_details]
         try:
             # Create a new branch
             base_branch = self.repo.default_branch
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            new_branch_name = f"fix/sentry-{issue_details['id']}-{timestamp}"
+            if len(issues) == 1:
+                new_branch_name = f"fix/sentry-{issues[0]['id']}-{timestamp}"
+            else:
+                new_branch_name = f"fix/sentry-{issues[0]['id']}-and-{len(issues) - 1}-more-{timestamp}"
             
             logger.info(f"Creating new branch {new_branch_name}")
             
-            # Get the reference to the default branch
-            ref = self.repo.get_git_ref(f"heads/{base_branch}")
+            # Branch from the snapshot the file was read from, so `content_sha`
+            # matches the file on the new branch
+            base_sha = self.get_snapshot()['commit']
             
             # Create new branch
-            self.repo.create_git_ref(f"refs/heads/{new_branch_name}", ref.object.sha)
+            self.count_call()
+            self.repo.create_git_ref(f"refs/heads/{new_branch_name}", base_sha)
             
             # Update file in the new branch
-            commit_message = f"Fix: {issue_details['title']} (Sentry ID: {issue_details['id']})"
+            if len(issues) == 1:
+                commit_message = f"Fix: {issues[0]['title']} (Sentry ID: {issues[0]['id']})"
+            else:
+                ids = ", ".join(issue['id'] for issue in issues)
+                commit_message = f"Fix {len(issues)} Sentry issues in {file_path} (Sentry IDs: {ids})"
             
             logger.info(f"Updating file {file_path} in branch {new_branch_name}")
+            self.count_call()
             self.repo.update_file(
                 path=file_path,
                 message=commit_message,
@@ -234,23 +549,43 @@ class GitHubClient:
             )
             
             # Create pull request
-            pr_title = f"🤖 [AI Fix] {issue_details['title']}"
-            pr_body = f"""
-## Automated fix for Sentry issue #{issue_details['id']}
+            if len(issues) == 1:
+                issue = issues[0]
+                pr_title = f"🤖 [AI Fix] {issue['title']}"
+                pr_body = f"""
+## Automated fix for Sentry issue #{issue['id']}
 
 ### Issue Details
-- **Error:** {issue_details['title']}
-- **Sentry Link:** {issue_details['permalink']}
+- **Error:** {issue['title']}
+- **Sentry Link:** {issue['permalink']}
 - **File:** {file_path}
 
 ### AI Explanation
 {explanation}
 
+---
+*This PR was automatically generated by the Sentry AI Fix Agent*
+            """
+            else:
+                issue_lines = "\n".join(
+                    f"- **#{issue['id']}** {issue['title']} ({issue['permalink']})" for issue in issues
+                )
+                pr_title = f"🤖 [AI Fix] {len(issues)} Sentry issues in {file_path}"
+                pr_body = f"""
+## Automated fix for {len(issues)} Sentry issues in {file_path}
+
+### Issues
+{issue_lines}
+
+### AI Explanation
+{explanation}
+
 ---
 *This PR was automatically generated by the Sentry AI Fix Agent*
             """
             
             logger.info(f"Creating pull request for branch {new_branch_name}")
+            self.count_call()
             pr = self.repo.create_pull(
                 title=pr_title,
                 body=pr_body,
@@ -327,6 +662,65 @@ class GeminiClient:
         [The entire fixed file with your changes]
         """
         
+        return self.request_fix(prompt)
+    
+    def generate_group_fix(self, file_path: str, file_content: str, clusters: List[Dict]) -> Dict:
+        """
+        Use Gemini to generate one fix for several errors in the same file.
+        Each cluster is an error location: {'context': ..., 'issues': [...]}.
+        """
+        if not clusters or not file_content:
+            logger.warning("Missing errors or file content for generating fix")
+            return None
+        
+        errors = []
+        for number, cluster in enumerate(clusters, 1):
+            context_info = cluster['context']
+            messages = "\n        ".join(
+                f"- {issue['title']} (Sentry ID: {issue['id']})" for issue in cluster['issues']
+            )
+            errors.append(f"""
+        ERROR {number}:
+        {messages}
+        
+        FUNCTION: {context_info.get('function', 'unknown')}
+        LINE NUMBER: {context_info.get('line_number', 'unknown')}
+        EXCEPTION TYPE: {context_info.get('exception_type') or 'unknown'}
+        
+        Line with error:
+        ```python
+        {context_info.get('context_line', '')}
+        ```
+        """)
+        
+        prompt = f"""
+        You are an expert Python developer tasked with fixing bugs in a Django codebase.
+        
+        The following {len(clusters)} errors were all raised from code in the same file.
+        
+        FILE: {file_path}
+        {"".join(errors)}
+        Here's the full file content:
+        ```python
+        {file_content}
+        ```
+        
+        Please provide a fix for every one of these errors that is minimal and focused on the specific errors.
+        Explain what's causing each error and provide the corrected code.
+        
+        Return your response in the following format:
+        
+        EXPLANATION:
+        [Explanation of each issue and your fix, numbered like the errors above]
+        
+        FIXED_CODE:
+        [The entire fixed file with all of your changes]
+        """
+        
+        return self.request_fix(prompt)
+    
+    def request_fix(self, prompt: str) -> Dict:
+        """Send a fix prompt and parse the EXPLANATION/FIXED_CODE answer"""
         try:
             logger.info("Generating fix with Gemini")
             response = self.model.generate_content(prompt)
@@ -359,6 +753,21 @@ class GeminiClient:
             logger.error(f"Error generating AI fix: {e}")
             return None
 
+class ServiceLimits:
+    """Per-service caps on concurrent calls, shared by all pipeline workers"""
+    
+    def __init__(self, sentry: int = 4, github: int = 2, gemini: int = 4):
+        self.semaphores = {
+            "sentry": threading.BoundedSemaphore(sentry),
+            "github": threading.BoundedSemaphore(github),
+            "gemini": threading.BoundedSemaphore(gemini),
+        }
+    
+    @contextmanager
+    def __call__(self, service: str):
+        with self.semaphores[service]:
+            yield
+
 def extract_stack_context(event_data: Dict) -> Tuple[Optional[Dict], Optional[str]]:
     """Extract relevant code context from the stack trace"""
     try:
@@ -410,84 +819,232 @@ def extract_stack_context(event_data: Dict) -> Tuple[Optional[Dict], Optional[st
             'context_line': context_line,
             'pre_context': pre_context,
             'post_context': post_context,
-            'function': relevant_frame.get('function', '')
+            'function': relevant_frame.get('function', ''),
+            'exception_type': exception.get('type', '')
         }, file_path
     except Exception as e:
         logger.error(f"Error extracting stack context: {e}")
         return None, None
 
-def process_issue(issue: Dict, sentry_client: SentryClient, github_client: GitHubClient, 
-                 gemini_client: GeminiClient) -> bool:
-    """Process a single issue"""
+def prepare_issue(issue: Dict, sentry_client: SentryClient,
+                  limits: Optional[ServiceLimits] = None) -> Optional[Dict]:
+    """Fetch an issue's latest event and locate the code it failed in"""
+    limits = limits or ServiceLimits()
     issue_id = issue['id']
-    issue_title = issue['title']
     
-    logger.info(f"Processing issue {issue_id}: {issue_title}")
+    logger.info(f"Processing issue {issue_id}: {issue['title']}")
     
     try:
         # Get detailed information about the issue
-        issue_details = sentry_client.get_issue_details(issue_id)
+        with limits("sentry"):
+            issue_details = sentry_client.get_issue_details(issue_id)
         
         # Extract context information from the stack trace
         context_info, file_path = extract_stack_context(issue_details)
         
         if not context_info or not file_path:
             logger.warning(f"Could not extract context for issue {issue_id}")
-            return False
+            return None
         
+        return {"issue": issue, "context": context_info}
+    except Exception as e:
+        logger.error(f"Error processing issue {issue_id}: {e}")
+        return None
+
+def group_issues(prepared: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Group prepared issues by file, and within a file into clusters of
+    issues failing in the same function with the same exception type.
+    Returns {file_path: [{'context': ..., 'issues': [...]}, ...]}.
+    """
+    clusters: Dict[Tuple[str, str, str], Dict] = {}
+    for item in prepared:
+        context_info = item['context']
+        key = (context_info['file_path'], context_info.get('function', ''), context_info.get('exception_type', ''))
+        # The first issue's frame stands in for the whole cluster
+        clusters.setdefault(key, {"context": context_info, "issues": []})["issues"].append(item['issue'])
+    
+    groups: Dict[str, List[Dict]] = {}
+    for (file_path, _, _), cluster in clusters.items():
+        groups.setdefault(file_path, []).append(cluster)
+    return groups
+
+def fix_file(file_path: str, clusters: List[Dict], sentry_client: SentryClient, github_client: GitHubClient,
+             gemini_client: GeminiClient, limits: Optional[ServiceLimits] = None) -> bool:
+    """Generate one fix for every issue in a file, open one PR and report it on each issue"""
+    limits = limits or ServiceLimits()
+    issues = [issue for cluster in clusters for issue in cluster['issues']]
+    issue_ids = ", ".join(issue['id'] for issue in issues)
+    
+    try:
         # Get the file content from GitHub
-        file_content, content_sha = github_client.get_file_content(file_path)
+        with limits("github"):
+            file_content, content_sha = github_client.get_file_content(file_path)
         
         if not file_content:
             logger.warning(f"Could not get file content for {file_path}")
             return False
         
-        # Generate a fix using AI
-        fix_result = gemini_client.generate_fix(issue_title, file_content, context_info)
+        # Generate a fix using AI; duplicates of one error need the plain prompt
+        with limits("gemini"):
+            if len(clusters) == 1:
+                fix_result = gemini_client.generate_fix(issues[0]['title'], file_content, clusters[0]['context'])
+            else:
+                fix_result = gemini_client.generate_group_fix(file_path, file_content, clusters)
         
         if not fix_result:
-            logger.warning(f"Could not generate fix for issue {issue_id}")
+            logger.warning(f"Could not generate fix for issues {issue_ids}")
             return False
         
         # Create a PR with the fix
         try:
-            pr_url = github_client.create_pull_request(
-                file_path, 
-                content_sha, 
-                fix_result["fixed_code"], 
-                {
-                    "id": issue_id,
-                    "title": issue_title,
-                    "permalink": issue['permalink']
-                }, 
-                fix_result["explanation"]
-            )
-            
-            logger.info(f"Created PR for issue {issue_id}: {pr_url}")
-            
-            # Add a comment to the Sentry issue
-            comment = f"I've created a PR with a potential fix: {pr_url}"
-            sentry_client.add_comment(issue_id, comment)
-            
-            # Add a tag to the issue in Sentry
-            sentry_client.add_tag_to_issue(issue_id, "ai-fix-pr-raised", "true")
-            
-            return True
-            
+            with limits("github"):
+                pr_url = github_client.create_pull_request(
+                    file_path, 
+                    content_sha, 
+                    fix_result["fixed_code"], 
+                    [
+                        {
+                            "id": issue['id'],
+                            "title": issue['title'],
+                            "permalink": issue['permalink']
+                        }
+                        for issue in issues
+                    ], 
+                    fix_result["explanation"]
+                )
         except Exception as e:
-            logger.error(f"Error creating PR for issue {issue_id}: {e}")
+            logger.error(f"Error creating PR for issues {issue_ids}: {e}")
             return False
             
     except Exception as e:
-        logger.error(f"Error processing issue {issue_id}: {e}")
+        logger.error(f"Error processing issues {issue_ids}: {e}")
+        return False
+    
+    logger.info(f"Created PR for issues {issue_ids}: {pr_url}")
+    
+    # The PR is raised, so the issues count as fixed even if reporting it
+    # back to Sentry fails; each issue is reported on its own
+    with limits("sentry"):
+        for issue in issues:
+            try:
+                # Add a comment to the Sentry issue
+                comment = f"I've created a PR with a potential fix: {pr_url}"
+                sentry_client.add_comment(issue['id'], comment)
+            except Exception as e:
+                logger.error(f"Error commenting the PR on issue {issue['id']}: {e}")
+            
+            try:
+                # Add a tag to the issue in Sentry
+                sentry_client.add_tag_to_issue(issue['id'], "ai-fix-pr-raised", "true")
+            except Exception as e:
+                logger.error(f"Error tagging issue {issue['id']}: {e}")
+    
+    return True
+
+def process_issue(issue: Dict, sentry_client: SentryClient, github_client: GitHubClient, 
+                 gemini_client: GeminiClient, limits: Optional[ServiceLimits] = None) -> bool:
+    """Process a single issue"""
+    prepared = prepare_issue(issue, sentry_client, limits)
+    if not prepared:
         return False
+    file_path, clusters = next(iter(group_issues([prepared]).items()))
+    return fix_file(file_path, clusters, sentry_client, github_client, gemini_client, limits)
+
+def run_pipeline(issues: Iterable[Dict], sentry_client: SentryClient, github_client: GitHubClient,
+                 gemini_client: GeminiClient, workers: int = 4, limits: Optional[ServiceLimits] = None,
+                 checkpoint: Optional[CheckpointStore] = None, batch_size: int = 50,
+                 limit: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Process issues on a pool of workers and return (processed, succeeded).
+    Issues the checkpoint marks as done are skipped and every outcome is
+    recorded as soon as it is known. `limit` caps the issues processed, not
+    counting skipped ones, so issues Sentry keeps returning (e.g. because
+    tagging them failed) cannot crowd out new ones.
+    
+    Issue details are fetched as the issues stream in. Every `batch_size`
+    prepared issues are grouped by the code they failed in, and each file
+    gets one fix and one PR covering its issues in the batch, so duplicates
+    cost a single generation while later pages are still being fetched.
+    Issues in one file that land in different batches get separate PRs.
+    The per-service limits keep any one API from being flooded while
+    files are in different stages.
+    """
+    limits = limits or ServiceLimits()
+    workers = max(1, workers)
+    processed = success_count = submitted = 0
+    batch = []
+    pending = {}
+    fixes = {}
+    
+    def record(issue_ids, success):
+        nonlocal processed, success_count
+        processed += len(issue_ids)
+        success_count += len(issue_ids) if success else 0
+        if checkpoint:
+            for issue_id in issue_ids:
+                checkpoint.record(issue_id, success)
+    
+    def dispatch():
+        if not batch:
+            return
+        groups = group_issues(batch)
+        clusters = sum(len(file_clusters) for file_clusters in groups.values())
+        logger.info(f"Grouped {len(batch)} issues into {clusters} error locations in {len(groups)} files")
+        for file_path, file_clusters in groups.items():
+            future = pool.submit(fix_file, file_path, file_clusters, sentry_client, github_client,
+                                 gemini_client, limits)
+            fixes[future] = [issue['id'] for cluster in file_clusters for issue in cluster['issues']]
+        batch.clear()
+    
+    def collect(done):
+        for future in done:
+            if future in fixes:
+                # fix_file logs its own failures and returns False
+                record(fixes.pop(future), future.result())
+                continue
+            issue_id = pending.pop(future)
+            # prepare_issue logs its own failures and returns None
+            result = future.result()
+            if result:
+                batch.append(result)
+            else:
+                record([issue_id], False)
+        if len(batch) >= batch_size:
+            dispatch()
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="issue") as pool:
+        for issue in issues:
+            if checkpoint and checkpoint.is_done(issue['id']):
+                logger.info(f"Skipping issue {issue['id']}: already fixed in an earlier run")
+                continue
+            pending[pool.submit(prepare_issue, issue, sentry_client, limits)] = issue['id']
+            submitted += 1
+            if limit and submitted >= limit:
+                break
+            # Keep a bounded window in flight so pages are fetched as workers free up
+            while len(pending) + len(fixes) >= workers * 2:
+                collect(wait([*pending, *fixes], return_when=FIRST_COMPLETED).done)
+        while pending:
+            collect(wait([*pending, *fixes], return_when=FIRST_COMPLETED).done)
+        dispatch()
+        collect(wait(fixes).done)
+    return processed, success_count
 
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description="Sentry AI Fix Agent")
     parser.add_argument("--config", help="Path to configuration file")
     parser.add_argument("--limit", type=int, default=10, help="Maximum number of issues to process")
-    parser.add_argument("--all", action="store_true", help="Process all unresolved issues")
+    parser.add_argument("--all", action="store_true",
+                        help="Process all unresolved issues, ignoring --limit and the last run time")
+    parser.add_argument("--state", default="agent_state.sqlite3", help="SQLite file recording per-issue progress")
+    parser.add_argument("--workers", type=int, default=4, help="Issues processed concurrently (1 = sequential)")
+    parser.add_argument("--sentry-concurrency", type=int, default=4, help="Maximum concurrent Sentry API calls")
+    parser.add_argument("--github-concurrency", type=int, default=2, help="Maximum concurrent GitHub API calls")
+    parser.add_argument("--gemini-concurrency", type=int, default=4, help="Maximum concurrent Gemini generations")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="Issues grouped into PRs at a time; larger batches merge more duplicates")
     
     args = parser.parse_args()
     
@@ -498,8 +1055,11 @@ def main():
         logger.error("Invalid configuration")
         return 1
     
+    checkpoint = CheckpointStore(args.state)
+    started = datetime.now()
+    
     # Get last run time (if not processing all issues)
-    last_run = None if args.all else get_last_run_time()
+    last_run = None if args.all else checkpoint.get_last_run_time()
     
     if last_run:
         logger.info(f"Processing issues since {last_run}")
@@ -507,29 +1067,42 @@ def main():
         logger.info("Processing all unresolved issues")
     
     # Initialize clients
-    sentry_client = SentryClient(config)
+    sentry_client = SentryClient(config, pool_size=args.sentry_concurrency)
     github_client = GitHubClient(config)  
     gemini_client = GeminiClient(config)
     
-    # Get recent issues
+    # Stream issues page by page into the workers; run_pipeline applies the
+    # limit so issues that are already done don't count against it
+    issues = sentry_client.iter_issues(since=last_run)
+    limits = ServiceLimits(
+        sentry=args.sentry_concurrency,
+        github=args.github_concurrency,
+        gemini=args.gemini_concurrency,
+    )
     try:
-        issues = sentry_client.get_recent_issues(limit=args.limit, since=last_run)
+        processed, success_count = run_pipeline(issues, sentry_client, github_client, gemini_client,
+                                                workers=args.workers, limits=limits, checkpoint=checkpoint,
+                                                batch_size=args.batch_size, limit=None if args.all else args.limit)
     except Exception as e:
+        # Outcomes recorded so far are kept; the next run resumes from them
         logger.error(f"Failed to fetch issues: {e}")
+        checkpoint.close()
+        sentry_client.close()
         return 1
     
-    if not issues:
+    if not processed:
         logger.info("No issues to process")
-        return 0
     
-    # Process each issue
-    success_count = 0
-    for issue in issues:
-        if process_issue(issue, sentry_client, github_client, gemini_client):
-            success_count += 1
+    # Only move the watermark past issues that were all handled; a failed
+    # issue keeps its window open so the next run retries it
+    if processed == success_count:
+        checkpoint.save_last_run_time(started)
+    checkpoint.close()
     
-    # Save the current time as the last run time
-    save_last_run_time()
+    for endpoint, stats in sentry_client.metrics.summary().items():
+        logger.info(f"Sentry {endpoint}: {stats}")
+    logger.info(f"GitHub API calls: {github_client.api_calls}")
+    sentry_client.close()
     
-    logger.info(f"Processed {len(issues)} issues, {success_count} successful")
+    logger.info(f"Processed {processed} issues, {success_count} successful")
     return 0
@@ -0,0 +1,229 @@
+import hashlib
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+def get_extension(name):
+    return os.path.splitext(name or '')[1].lstrip('.').lower()
+
+def compute_file_metadata(file):
+    """
+    Size, extension, content type and SHA-256 of a file, read in chunks.
+    Works on a fresh upload (before it reaches storage) or a stored file.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in file.chunks():
+        hasher.update(chunk)
+        size += len(chunk)
+
+    content_type = getattr(file, 'content_type', None)
+    if not content_type:
+        content_type = mimetypes.guess_type(file.name or '')[0] or 'application/octet-stream'
+
+    return {
+        'size': size,
+        'extension': get_extension(file.name),
+        'content_type': content_type,
+        'content_hash': hasher.hexdigest(),
+    }
+
+# Blocks moved between the request/response and disk; memory use per
+# transfer never exceeds this regardless of file size
+TRANSFER_BLOCK_SIZE = 1024 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class UploadOffsetMismatch(Exception):
+    """The chunk doesn't start where the upload left off"""
+    def __init__(self, received):
+        super().__init__(f'Chunk does not start at the current upload offset ({received}).')
+        self.received = received
+
+class RangeNotSatisfiable(APIException):
+    status_code = status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    default_detail = 'Requested range not satisfiable.'
+    default_code = 'range_not_satisfiable'
+
+def upload_temp_dir():
+    configured = getattr(settings, 'ATTACHMENT_UPLOAD_TEMP_DIR', None)
+    path = Path(configured) if configured else Path(settings.MEDIA_ROOT) / 'attachment-uploads'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def upload_temp_path(upload):
+    return upload_temp_dir() / f'{upload.pk}.part'
+
+def parse_content_range(header):
+    """`bytes start-end/total` -> (start, length, total or None)"""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise ValidationError({'Content-Range': ['Expected "bytes <start>-<end>/<total|*>".']})
+    start, end = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == '*' else int(match.group(3))
+    if end < start or (total is not None and end >= total):
+        raise ValidationError({'Content-Range': ['Invalid byte range.']})
+    return start, end - start + 1, total
+
+def append_chunk(upload, stream, content_range, content_length):
+    """
+    Append one chunk to the partial file. Chunks must arrive in order; a
+    client that lost track asks for `received` and resumes from there.
+    """
+    start, length, total = parse_content_range(content_range)
+    if content_length != length:
+        raise ValidationError({'Content-Length': ['Does not match Content-Range.']})
+
+    with transaction.atomic():
+        upload = type(upload).objects.select_for_update().get(pk=upload.pk)
+        if start != upload.received:
+            raise UploadOffsetMismatch(upload.received)
+        if total is not None:
+            if upload.total_size is not None and upload.total_size != total:
+                raise ValidationError({'Content-Range': ['Total size changed during the upload.']})
+            upload.total_size = total
+
+        path = upload.temporary_path()
+        with open(path, 'r+b' if path.exists() else 'wb') as part:
+            # Drop anything a previously interrupted chunk left past the offset
+            part.truncate(start)
+            part.seek(start)
+            remaining = length
+            while remaining:
+                block = stream.read(min(TRANSFER_BLOCK_SIZE, remaining))
+                if not block:
+                    raise ValidationError({'detail': 'Request body ended before the chunk was complete.'})
+                part.write(block)
+                remaining -= len(block)
+
+        upload.received = start + length
+        upload.save(update_fields=['received', 'total_size'])
+    return upload
+
+class AssembledUpload(File):
+    """A finished partial file; FileSystemStorage moves it instead of copying"""
+    def temporary_file_path(self):
+        return self.name
+
+def complete_upload(upload):
+    """Turn a fully received upload into an Attachment"""
+    from .models import Attachment
+
+    if upload.total_size is None or upload.received != upload.total_size:
+        raise ValidationError({'detail': f'Upload incomplete: {upload.received} of {upload.total_size} bytes received.'})
+
+    path = upload.temporary_path()
+    with transaction.atomic():
+        with open(path, 'rb') as part:
+            metadata = compute_file_metadata(File(part, name=upload.filename))
+            if upload.content_type:
+                metadata['content_type'] = upload.content_type
+            attachment = Attachment(task_id=upload.task_id, description=upload.description, **metadata)
+            # Hashing left the handle at EOF; storages that copy rather than move read from here
+            part.seek(0)
+            attachment.file.save(upload.filename, AssembledUpload(part, name=str(path)), save=False)
+        attachment.save()
+        upload.delete()
+    if path.exists():
+        path.unlink()
+    return attachment
+
+def discard_upload(upload):
+    path = upload.temporary_path()
+    upload.delete()
+    if path.exists():
+        path.unlink()
+
+def parse_range(header, size):
+    """A single `bytes=` range -> (start, end) inclusive, or None for the whole file"""
+    match = RANGE_RE.match(header or '')
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+def iter_file_range(file, start, length):
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining:
+            block = file.read(min(TRANSFER_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        file.close()
+
+def local_path(attachment):
+    try:
+        return attachment.file.path
+    except NotImplementedError:
+        return None
+
+def build_download_response(attachment, request):
+    """
+    Serve an attachment. With ATTACHMENT_SENDFILE_MODE set the web server
+    sends the bytes (X-Sendfile / X-Accel-Redirect); otherwise full files go
+    through FileResponse, which the WSGI server can hand to sendfile(), and
+    Range requests are streamed block by block.
+    """
+    size = attachment.file_size()
+    content_type = attachment.content_type or 'application/octet-stream'
+    filename = os.path.basename(attachment.file.name)
+    etag = f'"{attachment.content_hash}"' if attachment.content_hash else None
+
+    mode = getattr(settings, 'ATTACHMENT_SENDFILE_MODE', None)
+    path = local_path(attachment)
+    if mode and path:
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel-redirect':
+            prefix = getattr(settings, 'ATTACHMENT_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + attachment.file.name
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range and if_range and if_range != etag:
+        byte_range = None
+
+    file = attachment.file.open('rb')
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            iter_file_range(file, start, length),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+        response['Content-Length'] = str(size)
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    return response
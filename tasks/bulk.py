@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_tasks
+from .counters import update_category_counters
+from .models import Task
+from .search import index_tasks, unindex_tasks
+from .signals import suspend_signal_handlers
+
+BATCH_SIZE = 500
+SEARCH_FIELDS = {'title', 'description'}
+COUNTER_SOURCE_FIELDS = {'category', 'completed', 'priority'}
+
+def counter_state(task):
+    return task.category_id, task.completed, task.priority
+
+def bulk_create_tasks(valid_items):
+    """Insert validated items with bulk_create; returns [(index, task)]"""
+    tasks = [Task(**data) for _, data in valid_items]
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        update_category_counters(added=[counter_state(task) for task in tasks])
+        index_tasks(tasks)
+    invalidate_tasks([task.pk for task in tasks], {task.category_id for task in tasks})
+    return [(index, task) for (index, _), task in zip(valid_items, tasks)]
+
+def bulk_update_tasks(valid_items):
+    """
+    Apply per-item partial updates with one bulk_update. `valid_items` is a
+    list of (index, task_id, data); returns (updated [(index, task)], missing
+    [index]).
+    """
+    with transaction.atomic():
+        tasks = Task.objects.select_for_update().in_bulk([task_id for _, task_id, _ in valid_items])
+        previous_states = {task.pk: counter_state(task) for task in tasks.values()}
+        previous_categories = {state[0] for state in previous_states.values()}
+        now = timezone.now()
+        updated, missing, fields = [], [], {'updated_at'}
+        for index, task_id, data in valid_items:
+            task = tasks.get(task_id)
+            if task is None:
+                missing.append(index)
+                continue
+            for field, value in data.items():
+                setattr(task, field, value)
+            task.updated_at = now
+            fields.update(data)
+            updated.append((index, task))
+
+        # One row per task: a repeated id must not index or count it twice
+        changed = list({task.pk: task for _, task in updated}.values())
+        Task.objects.bulk_update(changed, sorted(fields), batch_size=BATCH_SIZE)
+        update_category_counters(
+            removed=[previous_states[task.pk] for task in changed],
+            added=[counter_state(task) for task in changed],
+        )
+        if fields & SEARCH_FIELDS:
+            index_tasks(changed)
+
+    invalidate_tasks(
+        [task.pk for task in changed],
+        previous_categories | {task.category_id for task in changed},
+    )
+    return updated, missing
+
+def bulk_apply_changes(task_ids, changes):
+    """Apply the same changes to many tasks with a single UPDATE"""
+    with transaction.atomic():
+        queryset = Task.objects.filter(pk__in=task_ids)
+        found = list(queryset.values_list('pk', 'category_id', 'completed', 'priority'))
+        queryset.update(updated_at=timezone.now(), **changes)
+        if COUNTER_SOURCE_FIELDS & set(changes):
+            update_category_counters(
+                removed=[state for _, *state in found],
+                added=Task.objects.filter(pk__in=task_ids).values_list('category_id', 'completed', 'priority'),
+            )
+        if SEARCH_FIELDS & set(changes):
+            index_tasks(list(Task.objects.filter(pk__in=task_ids).only('id', 'title', 'description')))
+
+    found_ids = {pk for pk, *_ in found}
+    categories = {category_id for _, category_id, *_ in found}
+    if 'category' in changes:
+        categories.add(getattr(changes['category'], 'pk', None))
+    invalidate_tasks(found_ids, categories)
+    return found_ids
+
+def bulk_delete_tasks(task_ids):
+    """Delete tasks (and their comments/attachments) in one transaction"""
+    with transaction.atomic(), suspend_signal_handlers():
+        queryset = Task.objects.filter(pk__in=task_ids)
+        found = list(queryset.values_list('pk', 'category_id', 'completed', 'priority'))
+        queryset.delete()
+        update_category_counters(removed=[state for _, *state in found])
+        unindex_tasks([pk for pk, *_ in found])
+
+    found_ids = {pk for pk, *_ in found}
+    invalidate_tasks(found_ids, {category_id for _, category_id, *_ in found})
+    return found_ids
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_PREFIX = 'tasks'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+def get_cache():
+    return caches[getattr(settings, 'TASKS_CACHE_ALIAS', 'default')]
+
+def get_timeout():
+    return getattr(settings, 'TASKS_CACHE_TIMEOUT', 300)
+
+def version_key(resource):
+    return f'{CACHE_PREFIX}:version:{resource}'
+
+def get_versions(resources):
+    """
+    Current version of each resource ('task:1', 'category:2', 'home').
+    A missing version starts from the clock rather than 1, so an evicted
+    counter can never line up with entries cached under an older one.
+    """
+    cache = get_cache()
+    keys = [version_key(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+async def aget_versions(resources):
+    cache = get_cache()
+    keys = [version_key(resource) for resource in resources]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+def bump_versions(*resources):
+    """Invalidate every cache entry that depends on any of `resources`"""
+    cache = get_cache()
+    for resource in set(resources):
+        key = version_key(resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+def record(name, outcome):
+    with _stats_lock:
+        _stats[(name, outcome)] += 1
+
+def get_cache_stats():
+    """Hit/miss counters per cached resource for this process"""
+    with _stats_lock:
+        items = list(_stats.items())
+    stats = {}
+    for (name, outcome), count in items:
+        stats.setdefault(name, {'hits': 0, 'misses': 0})[outcome] = count
+    return stats
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+def cache_key(name, key_parts, versions):
+    parts = [str(part) for part in key_parts] + [str(version) for version in versions]
+    return f'{CACHE_PREFIX}:{name}:' + ':'.join(parts)
+
+def get_or_compute(name, key_parts, resources, compute):
+    """
+    Return the cached value for `name` + `key_parts`, calling `compute()` on
+    a miss. The key embeds the current version of each resource the value
+    depends on, so bumping any of them makes the old entry unreachable.
+    """
+    cache = get_cache()
+    key = cache_key(name, key_parts, get_versions(resources))
+
+    value = cache.get(key)
+    if value is not None:
+        record(name, 'hits')
+        return value
+
+    record(name, 'misses')
+    value = compute()
+    cache.set(key, value, get_timeout())
+    return value
+
+async def aget_or_compute(name, key_parts, resources, compute):
+    """get_or_compute for async views; `compute` is a coroutine function"""
+    cache = get_cache()
+    key = cache_key(name, key_parts, await aget_versions(resources))
+
+    value = await cache.aget(key)
+    if value is not None:
+        record(name, 'hits')
+        return value
+
+    record(name, 'misses')
+    value = await compute()
+    await cache.aset(key, value, get_timeout())
+    return value
+
+def invalidate_tasks(task_ids=(), category_ids=()):
+    """For writes that bypass model signals, e.g. queryset update()"""
+    resources = [f'task:{task_id}' for task_id in task_ids]
+    resources += [f'category:{category_id}' for category_id in category_ids if category_id is not None]
+    bump_versions('home', *resources)
@@ -0,0 +1,106 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Task, Category, Comment, Attachment
+
+RECOUNT_BATCH_SIZE = 500
+
+PRIORITY_COUNTERS = {
+    1: 'low_count',
+    2: 'medium_count',
+    3: 'high_count',
+    4: 'critical_count',
+}
+
+def task_contribution(category_id, completed, priority):
+    """The counter values one task adds to its category"""
+    if category_id is None:
+        return None, {}
+    counters = {'task_count': 1}
+    if completed:
+        counters['completed_count'] = 1
+    if priority in PRIORITY_COUNTERS:
+        counters[PRIORITY_COUNTERS[priority]] = 1
+    return category_id, counters
+
+def category_deltas(removed=(), added=()):
+    """
+    Net per-category counter changes when the task states in `removed`
+    (category_id, completed, priority) are replaced by those in `added`.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for states, sign in ((removed, -1), (added, 1)):
+        for state in states:
+            category_id, counters = task_contribution(*state)
+            for field, value in counters.items():
+                deltas[category_id][field] += sign * value
+    return {
+        category_id: {field: value for field, value in counters.items() if value}
+        for category_id, counters in deltas.items()
+        if any(counters.values())
+    }
+
+def apply_category_deltas(deltas):
+    """One F() UPDATE per affected category"""
+    for category_id, counters in deltas.items():
+        Category.objects.filter(pk=category_id).update(
+            **{field: F(field) + value for field, value in counters.items()}
+        )
+
+def update_category_counters(removed=(), added=()):
+    apply_category_deltas(category_deltas(removed, added))
+
+def adjust_task_counter(task_id, field, delta):
+    Task.objects.filter(pk=task_id).update(**{field: F(field) + delta})
+
+def _count(queryset, group_by):
+    counted = queryset.order_by().values(group_by).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counted), Value(0))
+
+def category_counter_expressions():
+    """What each Category counter should be, computed from tasks_task"""
+    tasks = Task.objects.filter(category=OuterRef('pk'))
+    expressions = {
+        'task_count': _count(tasks, 'category'),
+        'completed_count': _count(tasks.filter(completed=True), 'category'),
+    }
+    for priority, field in PRIORITY_COUNTERS.items():
+        expressions[field] = _count(tasks.filter(priority=priority), 'category')
+    return expressions
+
+def task_counter_expressions():
+    return {
+        'comment_count': _count(Comment.objects.filter(task=OuterRef('pk')), 'task'),
+        'attachment_count': _count(Attachment.objects.filter(task=OuterRef('pk')), 'task'),
+    }
+
+def drifted_rows(model, expressions):
+    """Rows whose stored counters differ from a fresh count"""
+    annotated = model.objects.annotate(
+        **{f'actual_{field}': expression for field, expression in expressions.items()}
+    )
+    drift = Q()
+    for field in expressions:
+        drift |= ~Q(**{field: F(f'actual_{field}')})
+    return annotated.filter(drift)
+
+def recount(apply=True):
+    """
+    Reconcile every counter with the rows it summarizes. Returns the number
+    of drifted categories and tasks; with apply=True they are corrected.
+    """
+    drift = {}
+    with transaction.atomic():
+        for name, model, expressions in (
+            ('categories', Category, category_counter_expressions()),
+            ('tasks', Task, task_counter_expressions()),
+        ):
+            pks = list(drifted_rows(model, expressions).values_list('pk', flat=True))
+            drift[name] = len(pks)
+            if apply:
+                for start in range(0, len(pks), RECOUNT_BATCH_SIZE):
+                    model.objects.filter(pk__in=pks[start:start + RECOUNT_BATCH_SIZE]).update(**expressions)
+    return drift
@@ -0,0 +1,61 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# (column, values() lookup) for every exported task row
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('completed', 'completed'),
+    ('priority', 'priority'),
+    ('due_date', 'due_date'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('category_id', 'category_id'),
+    ('category', 'category__name'),
+    ('assigned_to_id', 'assigned_to_id'),
+    ('assigned_to', 'assigned_to__username'),
+]
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+def iter_task_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield one dict per task, reading `chunk_size` rows at a time through
+    flat values() so memory stays bounded however large the table is.
+    """
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    rows = queryset.order_by('id').values_list(*lookups).iterator(chunk_size=chunk_size)
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield dict(zip(columns, row))
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+    def write(self, value):
+        return value
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row.values()
+        ])
+
+def export_tasks(queryset, export_format='ndjson', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lazily render the queryset as NDJSON or CSV lines"""
+    rows = iter_task_rows(queryset, chunk_size)
+    if export_format == 'csv':
+        return iter_csv(rows)
+    return iter_ndjson(rows)
@@ -0,0 +1,41 @@
+from django.utils import timezone
+
+from .search import search_tasks
+
+def filter_tasks(queryset, params):
+    """
+    Apply the task API filters (search, category, completed, priority,
+    upcoming, overdue) from a query-param mapping.
+    """
+    # Filter by title/description through the full-text index
+    search = params.get('search', None)
+    if search:
+        queryset = search_tasks(queryset, search)
+
+    # Filter by category
+    category_id = params.get('category', None)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+
+    # Filter by completion status
+    completed = params.get('completed', None)
+    if completed is not None:
+        completed = completed.lower() == 'true'
+        queryset = queryset.filter(completed=completed)
+
+    # Filter by priority
+    priority = params.get('priority', None)
+    if priority:
+        queryset = queryset.filter(priority=priority)
+
+    # Filter by due date (upcoming tasks)
+    upcoming = params.get('upcoming', None)
+    if upcoming is not None:
+        queryset = queryset.filter(due_date__gte=timezone.now())
+
+    # Filter by overdue
+    overdue = params.get('overdue', None)
+    if overdue is not None:
+        queryset = queryset.filter(due_date__lt=timezone.now(), completed=False)
+
+    return queryset
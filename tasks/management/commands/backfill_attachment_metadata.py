@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from tasks.attachments import compute_file_metadata
+from tasks.models import Attachment
+
+METADATA_FIELDS = ['size', 'extension', 'content_type', 'content_hash']
+
+class Command(BaseCommand):
+    help = 'Record size, extension, content type and hash for attachments uploaded before they were stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = Attachment.objects.filter(size__isnull=True).only('id', 'file').order_by('id')
+        batch, updated, missing = [], 0, 0
+
+        for attachment in pending.iterator(chunk_size=batch_size):
+            try:
+                with attachment.file.open('rb') as file:
+                    metadata = compute_file_metadata(file)
+            except (FileNotFoundError, OSError, ValueError) as exc:
+                missing += 1
+                self.stderr.write(f'Attachment {attachment.pk}: {exc}')
+                continue
+            for field, value in metadata.items():
+                setattr(attachment, field, value)
+            batch.append(attachment)
+            if len(batch) >= batch_size:
+                Attachment.objects.bulk_update(batch, METADATA_FIELDS)
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Attachment.objects.bulk_update(batch, METADATA_FIELDS)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} attachment(s), {missing} unreadable'))
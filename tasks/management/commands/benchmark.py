@@ -0,0 +1,319 @@
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+
+from tasks.attachments import append_chunk, complete_upload
+from tasks.cache import get_cache
+from tasks.models import AttachmentUpload, Category, Comment, Task
+
+DEFAULT_SCALES = [100, 1000]
+SEED_ANCHOR = '2025-01-01'
+
+# (name, method, path, body). {task}, {tasks}, {category}, {comment},
+# {attachment} and {upload} are replaced with ids from the seeded data;
+# {fresh_upload} is a new, fully received upload for every request.
+ROUTES = [
+    ('home', 'get', '/', None),
+    ('task_list', 'get', '/tasks/', None),
+    ('task_list search', 'get', '/tasks/?search=fix', None),
+    ('task_list keyset', 'get', '/tasks/?pagination=keyset', None),
+    ('task_detail', 'get', '/tasks/{task}/', None),
+    ('task_create', 'get', '/tasks/create/', None),
+    ('task_update', 'get', '/tasks/{task}/update/', None),
+    ('task_delete', 'get', '/tasks/{task}/delete/', None),
+    ('task_toggle_completed', 'get', '/tasks/{task}/toggle-completed/', None),
+    ('category_list', 'get', '/categories/', None),
+    ('category_detail', 'get', '/categories/{category}/', None),
+
+    ('api-root', 'get', '/api/', None),
+    ('task-list', 'get', '/api/tasks/', None),
+    ('task-list shaped', 'get', '/api/tasks/?fields=id,title,category&expand=category', None),
+    ('task-list keyset', 'get', '/api/tasks/?pagination=keyset&page_size=50', None),
+    ('task-list drf', 'get', '/api/tasks/?format=json', None),
+    ('task-detail', 'get', '/api/tasks/{task}/', None),
+    ('task-export', 'get', '/api/tasks/export/', None),
+    ('task-bulk', 'patch', '/api/tasks/bulk/', {'ids': ['{task}'], 'changes': {'priority': 2}}),
+    ('task-toggle-completed', 'post', '/api/tasks/{task}/toggle_completed/', None),
+    ('task-days-until-due', 'get', '/api/tasks/{task}/days_until_due/', None),
+    ('task-statistics', 'get', '/api/tasks/{task}/statistics/', None),
+    ('task-batch-statistics', 'get', '/api/tasks/statistics/?ids={tasks}', None),
+    ('task-recent-comments', 'get', '/api/tasks/{task}/recent_comments/', None),
+    ('task-add-metadata', 'post', '/api/tasks/{task}/add_metadata/', {'metadata': '[]'}),
+    ('category-list', 'get', '/api/categories/', None),
+    ('category-detail', 'get', '/api/categories/{category}/', None),
+    ('category-tasks', 'get', '/api/categories/{category}/tasks/', None),
+    ('category-statistics', 'get', '/api/categories/{category}/statistics/', None),
+    ('category-task-breakdown', 'get', '/api/categories/{category}/task_breakdown/', None),
+    ('comment-list', 'get', '/api/comments/', None),
+    ('comment-detail', 'get', '/api/comments/{comment}/', None),
+    ('attachment-list', 'get', '/api/attachments/', None),
+    ('attachment-detail', 'get', '/api/attachments/{attachment}/', None),
+    ('attachment-download', 'get', '/api/attachments/{attachment}/download/', None),
+    ('attachmentupload-list', 'post', '/api/attachment-uploads/', {'task': '{task}', 'filename': 'bench.bin'}),
+    ('attachmentupload-detail', 'get', '/api/attachment-uploads/{upload}/', None),
+    ('attachmentupload-complete', 'post', '/api/attachment-uploads/{fresh_upload}/complete/', None),
+    ('api_task_detail', 'get', '/api/task/{task}/', None),
+    ('api_category_tasks', 'get', '/api/category/{category}/tasks/', None),
+    ('api_cache_stats', 'get', '/api/cache/stats/', None),
+]
+
+PLACEHOLDERS = ['task', 'tasks', 'category', 'comment', 'attachment', 'upload', 'fresh_upload']
+UPLOAD_CONTENT = b'benchmark'
+
+def iter_url_names(patterns, prefix=''):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_url_names(pattern.url_patterns, route)
+        else:
+            yield pattern.name or route
+
+def uncovered_routes(routes=ROUTES):
+    """URL names of the app (admin excluded) that no benchmark route resolves to"""
+    names = {
+        name
+        for pattern in get_resolver().url_patterns
+        if isinstance(pattern, URLResolver) and not str(pattern.pattern).startswith('admin')
+        for name in iter_url_names(pattern.url_patterns, str(pattern.pattern))
+    }
+    covered = set()
+    for _, _, path, _ in routes:
+        match = resolve(path.split('?')[0].format(**dict.fromkeys(PLACEHOLDERS, 1)))
+        covered.add(match.url_name or match.route)
+    return sorted(names - covered)
+
+def benchmark_ids():
+    """Representative rows for the {placeholders} in ROUTES"""
+    task = (
+        Task.objects.filter(due_date__isnull=False, comment_count__gte=3).order_by('pk').first()
+        or Task.objects.order_by('pk').first()
+    )
+    category = Category.objects.order_by('-task_count', 'pk').first()
+    upload = AttachmentUpload.objects.create(task=task, filename='benchmark.bin', total_size=1024)
+    tasks = Task.objects.order_by('pk').values_list('pk', flat=True)[:20]
+    comment = Comment.objects.order_by('pk').first()
+    # Seeded attachments have no file on disk; this one can be downloaded
+    attachment = complete_upload(fresh_upload(task.pk))
+    return {
+        'task': task.pk,
+        'tasks': ','.join(map(str, tasks)),
+        'category': category.pk,
+        'comment': comment.pk if comment else 0,
+        'attachment': attachment.pk,
+        'upload': upload.pk,
+    }
+
+def fresh_upload(task_id):
+    upload = AttachmentUpload.objects.create(task_id=task_id, filename='benchmark.bin', total_size=len(UPLOAD_CONTENT))
+    size = len(UPLOAD_CONTENT)
+    return append_chunk(upload, io.BytesIO(UPLOAD_CONTENT), f'bytes 0-{size - 1}/{size}', size)
+
+def route_preparer(path, body, ids):
+    """Callable returning the (path, body) of the next request, built outside the timed section"""
+    if '{fresh_upload}' not in path:
+        prepared = fill(path, ids), fill(body, ids)
+        return lambda: prepared
+
+    def prepare():
+        request_ids = {**ids, 'fresh_upload': fresh_upload(ids['task']).pk}
+        return fill(path, request_ids), fill(body, request_ids)
+    return prepare
+
+def fill(value, ids):
+    if isinstance(value, str):
+        filled = value.format(**ids)
+        return int(filled) if value.startswith('{') and filled.isdigit() else filled
+    if isinstance(value, list):
+        return [fill(item, ids) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, ids) for key, item in value.items()}
+    return value
+
+def request(client, method, path, body):
+    kwargs = {}
+    if body is not None:
+        kwargs = {'data': json.dumps(body), 'content_type': 'application/json'}
+    response = getattr(client, method)(path, **kwargs)
+    # Drain streaming responses so their cost is measured
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+def percentile(values, percent):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+def measure_route(client, method, prepare, iterations, warmup):
+    for _ in range(warmup):
+        request(client, method, *prepare())
+
+    latencies, queries, statuses = [], [], set()
+    for _ in range(iterations):
+        path, body = prepare()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            statuses.add(request(client, method, path, body))
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+
+    # A separate pass: tracing allocations slows every request down
+    path, body = prepare()
+    tracemalloc.start()
+    try:
+        request(client, method, path, body)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'method': method.upper(),
+        'path': path,
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries': max(queries),
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+def run_benchmarks(scales, iterations=20, warmup=2, routes=ROUTES, stdout=None):
+    """
+    Seed each scale and measure every route against it. Expects a database
+    it may wipe, e.g. the test database the command creates.
+    """
+    results = {}
+    client = Client(raise_request_exception=False)
+    for scale in scales:
+        call_command('seed', '--clear', '--tasks', str(scale), '--users', '20', '--categories', '10',
+                     '--anchor', SEED_ANCHOR, stdout=stdout or io.StringIO())
+        get_cache().clear()
+        ids = benchmark_ids()
+        results[str(scale)] = {}
+        for name, method, path, body in routes:
+            results[str(scale)][name] = measure_route(
+                client, method, route_preparer(path, body, ids), iterations, warmup,
+            )
+    return results
+
+def compare(baseline, results, tolerance=1.5, min_latency_ms=5.0, min_memory_kib=256):
+    """
+    Regressions of `results` against `baseline`: any extra query or changed
+    status, or median latency/peak memory worse than `tolerance` times the
+    baseline (and by more than a noise floor). The tail percentiles are
+    reported but not gated on; one GC pause moves them. Routes missing from
+    the baseline are skipped.
+    """
+    regressions = []
+    for scale, routes in results.items():
+        for name, current in routes.items():
+            before = baseline.get(scale, {}).get(name)
+            if before is None:
+                continue
+            label = f'[{scale} tasks] {name}'
+            if current['status'] != before['status']:
+                regressions.append(f'{label}: status {before["status"]} -> {current["status"]}')
+            if current['queries'] > before['queries']:
+                regressions.append(f'{label}: queries {before["queries"]} -> {current["queries"]}')
+            for metric, floor in (('p50_ms', min_latency_ms), ('peak_memory_kib', min_memory_kib)):
+                if current[metric] > before[metric] * tolerance and current[metric] - before[metric] > floor:
+                    regressions.append(f'{label}: {metric} {before[metric]} -> {current[metric]}')
+    return regressions
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database at several scales and measure every HTML and API route: latency '
+        'percentiles, query counts and peak memory. Writes JSON results and fails on regressions against '
+        'a baseline file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help='Comma-separated task counts')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--route', action='append', help='Only benchmark routes with this name')
+        parser.add_argument('--output', default='benchmark-results.json')
+        parser.add_argument('--baseline', help='Results file to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Also write the results to --baseline')
+        parser.add_argument('--tolerance', type=float, default=1.5, help='Allowed latency/memory ratio vs the baseline')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options['scales'].split(',')]
+        except ValueError:
+            raise CommandError('--scales must be comma-separated integers')
+        # Checked before the run so a typo doesn't cost a full benchmark
+        if options['baseline'] and not options['save_baseline'] and not os.path.exists(options['baseline']):
+            raise CommandError(f'Baseline {options["baseline"]} does not exist; create it with --save-baseline')
+        routes = [route for route in ROUTES if not options['route'] or route[0] in options['route']]
+        missing = uncovered_routes()
+        if missing:
+            self.stderr.write(f'Routes without a benchmark: {", ".join(missing)}')
+
+        media_root = tempfile.mkdtemp(prefix='benchmark-media-')
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                results = run_benchmarks(scales, options['iterations'], options['warmup'], routes)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        self.report(results)
+        document = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(document, file, indent=2)
+        self.stdout.write(f'Wrote {options["output"]}')
+
+        if options['baseline'] and options['save_baseline']:
+            shutil.copyfile(options['output'], options['baseline'])
+            self.stdout.write(f'Saved baseline {options["baseline"]}')
+        elif options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)['results']
+            regressions = compare(baseline, results, options['tolerance'])
+            if regressions:
+                for regression in regressions:
+                    self.stderr.write(regression)
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["baseline"]}'))
+
+    def report(self, results):
+        for scale, routes in results.items():
+            self.stdout.write(f'\n{scale} tasks')
+            self.stdout.write(
+                f'{"route":<28} {"status":<10} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"peak KiB":>9}'
+            )
+            for name, result in routes.items():
+                status = ','.join(map(str, result['status']))
+                self.stdout.write(
+                    f'{name:<28} {status:<10} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+                    f'{result["p99_ms"]:>8.2f} {result["queries"]:>8} {result["peak_memory_kib"]:>9.1f}'
+                )
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from bugtracker.asgi import AsyncRoutesHandler
+from tasks.models import Category, Task
+
+HOST = 'localhost'
+DEFAULT_PATHS = [
+    '/api/tasks/',
+    '/api/tasks/{task}/',
+    '/api/categories/',
+    '/api/categories/{category}/',
+    '/api/task/{task}/',
+    '/api/category/{category}/tasks/',
+    '/',
+]
+
+def wsgi_environ(path, query):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+def asgi_scope(path, query):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'accept', b'application/json')],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+
+def call_wsgi(app, path, query):
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    started = time.perf_counter()
+    response = app(wsgi_environ(path, query), start_response)
+    for _ in response:
+        pass
+    response.close()
+    return time.perf_counter() - started, statuses[0]
+
+async def call_asgi(app, path, query):
+    statuses = []
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Nothing more from the client; only a disconnect listener would get here
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    started = time.perf_counter()
+    await app(asgi_scope(path, query), receive, send)
+    return time.perf_counter() - started, statuses[0]
+
+def run_wsgi(app, path, query, total, concurrency):
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: call_wsgi(app, path, query), range(total)))
+    return results, time.perf_counter() - started
+
+async def run_asgi(app, path, query, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await call_asgi(app, path, query)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(total)))
+    return results, time.perf_counter() - started
+
+def summarize(results, elapsed):
+    latencies = sorted(latency for latency, _ in results)
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'rps': len(results) / elapsed,
+        'p50': percentiles[49] * 1000,
+        'p99': percentiles[98] * 1000,
+        'errors': sum(1 for _, status in results if status >= 500),
+    }
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests per second and p99 latency of the read endpoints under the WSGI and ASGI '
+        'handlers. Requests are driven in-process (threads for WSGI, coroutines for ASGI), so the '
+        'numbers measure Django and the views rather than a particular server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Paths to request; {task} and {category} are filled in')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per path and interface')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--query', default='', help='Query string sent with every request')
+
+    def handle(self, *args, **options):
+        task = Task.objects.order_by('pk').first()
+        category = Category.objects.order_by('pk').first()
+        if task is None or category is None:
+            raise CommandError('Needs at least one task and one category; seed the database first')
+        paths = [path.format(task=task.pk, category=category.pk) for path in options['paths'] or DEFAULT_PATHS]
+
+        wsgi, asgi = WSGIHandler(), AsyncRoutesHandler()
+        total, concurrency, query = options['requests'], options['concurrency'], options['query']
+
+        self.stdout.write(f'{"path":<36} {"interface":<9} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9} {"5xx":>5}')
+        for path in paths:
+            run_wsgi(wsgi, path, query, options['warmup'], concurrency)
+            asyncio.run(run_asgi(asgi, path, query, options['warmup'], concurrency))
+            rows = [
+                ('wsgi', summarize(*run_wsgi(wsgi, path, query, total, concurrency))),
+                ('asgi', summarize(*asyncio.run(run_asgi(asgi, path, query, total, concurrency)))),
+            ]
+            for interface, result in rows:
+                self.stdout.write(
+                    f'{path:<36} {interface:<9} {result["rps"]:>9.1f} {result["p50"]:>9.2f} '
+                    f'{result["p99"]:>9.2f} {result["errors"]:>5}'
+                )
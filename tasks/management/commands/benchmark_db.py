@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.utils import timezone
+
+from tasks.models import Task
+
+# name -> (PRAGMAS, keep the connection between operations)
+PROFILES = {
+    'default': ({}, False),
+    'persistent': ({}, True),
+    'tuned': (settings.SQLITE_PRAGMAS, True),
+}
+
+def add_database(alias, name, pragmas):
+    connections.databases[alias] = {
+        **connections.databases['default'],
+        'NAME': name,
+        'PRAGMAS': pragmas,
+    }
+
+def remove_database(alias):
+    connections[alias].close()
+    del connections.databases[alias]
+
+def run_worker(alias, write, persistent, deadline, counts, lock):
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        try:
+            with transaction.atomic(using=alias):
+                if write:
+                    task = Task.objects.using(alias).bulk_create([Task(title='benchmark', priority=2)])[0]
+                    Task.objects.using(alias).filter(pk=task.pk).update(completed=True, updated_at=timezone.now())
+                else:
+                    list(Task.objects.using(alias).filter(completed=False).order_by('-created_at')[:20])
+            done += 1
+        except OperationalError:
+            # 'database is locked': the writer gave up waiting
+            errors += 1
+        if not persistent:
+            connections[alias].close()
+    connections[alias].close()
+    with lock:
+        counts['writes' if write else 'reads'] += done
+        counts['errors'] += errors
+
+class Command(BaseCommand):
+    help = (
+        'Measure read and write throughput with concurrent writers on scratch SQLite databases: '
+        'a new connection per operation, persistent connections, and persistent connections '
+        'with the SQLITE_PRAGMAS profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--profile', action='append', choices=sorted(PROFILES), help='Default: all of them')
+
+    def handle(self, *args, **options):
+        # The scratch databases are SQLite files cloned from the default settings
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'benchmark_db needs a SQLite default database, not {connection.vendor}')
+        directory = tempfile.mkdtemp(prefix='benchmark-db-')
+        try:
+            template = os.path.join(directory, 'template.sqlite3')
+            add_database('benchmark_template', template, {})
+            call_command('migrate', database='benchmark_template', verbosity=0)
+            remove_database('benchmark_template')
+
+            self.stdout.write(f'{options["writers"]} writer(s), {options["readers"]} reader(s), {options["seconds"]}s each')
+            self.stdout.write(f'{"profile":<12} {"writes/s":>10} {"reads/s":>10} {"errors":>8}')
+            for name in options['profile'] or PROFILES:
+                pragmas, persistent = PROFILES[name]
+                alias = f'benchmark_{name}'
+                path = os.path.join(directory, f'{name}.sqlite3')
+                shutil.copy(template, path)
+                add_database(alias, path, pragmas)
+                try:
+                    counts = self.run_profile(alias, persistent, options)
+                finally:
+                    remove_database(alias)
+                seconds = options['seconds']
+                self.stdout.write(
+                    f'{name:<12} {counts["writes"] / seconds:>10.1f} {counts["reads"] / seconds:>10.1f} '
+                    f'{counts["errors"]:>8}'
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def run_profile(self, alias, persistent, options):
+        counts = {'writes': 0, 'reads': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+        threads = [
+            threading.Thread(target=run_worker, args=(alias, write, persistent, deadline, counts, lock))
+            for write in [True] * options['writers'] + [False] * options['readers']
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
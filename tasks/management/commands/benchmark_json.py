@@ -0,0 +1,47 @@
+import io
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.renderers import FastJSONParser, FastJSONRenderer, orjson
+from tasks.serializers import TaskSerializer
+
+class Command(BaseCommand):
+    help = 'Time rendering and parsing a large task list with the stock and the orjson-backed JSON renderer/parser'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Tasks in the rendered list')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson is not installed; FastJSONRenderer falls back to the stdlib encoder')
+
+        queryset = TaskSerializer.setup_eager_loading(Task.objects.order_by('pk'))[:options['tasks']]
+        rows = TaskSerializer(queryset, many=True).data
+        if not rows:
+            raise CommandError('No tasks to render; seed the database first')
+        # Repeat the stored tasks to reach the requested payload size
+        data = [rows[i % len(rows)] for i in range(options['tasks'])]
+
+        results = {}
+        for name, renderer, parser in (
+            ('stock', JSONRenderer(), JSONParser()),
+            ('fast', FastJSONRenderer(), FastJSONParser()),
+        ):
+            body = renderer.render(data)
+            render_time = min(timeit.repeat(lambda: renderer.render(data), number=1, repeat=options['repeat']))
+            parse_time = min(timeit.repeat(lambda: parser.parse(io.BytesIO(body)), number=1, repeat=options['repeat']))
+            results[name] = (render_time, parse_time, len(body))
+
+        self.stdout.write(f'{len(data)} tasks, {results["stock"][2] / 1024:.0f} KiB of JSON')
+        self.stdout.write(f'{"":<8} {"render ms":>10} {"parse ms":>10}')
+        for name, (render_time, parse_time, _) in results.items():
+            self.stdout.write(f'{name:<8} {render_time * 1000:>10.1f} {parse_time * 1000:>10.1f}')
+        stock, fast = results['stock'], results['fast']
+        self.stdout.write(self.style.SUCCESS(
+            f'Speedup: render {stock[0] / fast[0]:.1f}x, parse {stock[1] / fast[1]:.1f}x'
+        ))
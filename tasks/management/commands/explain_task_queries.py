@@ -0,0 +1,104 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from tasks.models import Task
+from tasks.pagination import KEYSET_ORDERINGS, keyset_order_by
+from tasks.views import TaskViewSet
+
+# Query-param combinations TaskViewSet.get_queryset supports, with the
+# index SQLite should pick for each. `ordered` marks plans that walk the
+# whole index instead of searching it, which is only cheap because the
+# index matches the ORDER BY and the page is LIMITed.
+FILTER_COMBINATIONS = [
+    ({'category': '1'}, 'tasks_task_category_id_ec02979a', False),
+    ({'completed': 'true'}, 'task_done_due_idx', True),
+    ({'completed': 'false'}, 'task_open_due_idx', True),
+    ({'priority': '3'}, 'task_priority_done_idx', False),
+    ({'upcoming': '1'}, 'task_due_date_idx', False),
+    ({'overdue': '1'}, 'task_open_due_idx', False),
+    ({'category': '1', 'completed': 'false'}, 'tasks_task_category_id_ec02979a', False),
+    ({'category': '1', 'completed': 'true', 'priority': '4'}, 'tasks_task_category_id_ec02979a', False),
+    ({'category': '1', 'priority': '2'}, 'tasks_task_category_id_ec02979a', False),
+    ({'completed': 'false', 'priority': '3'}, 'task_priority_done_idx', False),
+    ({'completed': 'false', 'overdue': '1'}, 'task_open_due_idx', False),
+]
+KEYSET_INDEXES = {'created': 'task_created_idx', 'due': 'task_due_date_idx'}
+
+def is_full_scan(plan, table):
+    """Detect a sequential scan of `table` in SQLite or PostgreSQL plan output"""
+    for line in plan.splitlines():
+        line = line.strip()
+        if f'Seq Scan on {table}' in line:
+            return True
+        if line.endswith(f'SCAN {table}') or (f'SCAN {table} ' in line and 'USING' not in line):
+            return True
+    return False
+
+def sqlite_index_access(plan, table):
+    """(index name, walked in full) for each SQLite plan step that reads `table` through an index"""
+    pattern = re.compile(rf'\b(SCAN|SEARCH) {table} USING (?:COVERING )?INDEX (\w+)')
+    return [(match[2], match[1] == 'SCAN') for match in pattern.finditer(plan)]
+
+def check_plan(plan, table, index, ordered):
+    """The problem with `plan`, or None when it reads `table` as expected"""
+    if is_full_scan(plan, table):
+        return 'FULL SCAN'
+    # The expected indexes are the SQLite planner's choices
+    if connection.vendor != 'sqlite':
+        return None
+    accesses = sqlite_index_access(plan, table)
+    if index not in [name for name, _ in accesses]:
+        used = ', '.join(name for name, _ in accesses) or 'no index'
+        return f'WRONG INDEX ({used}, expected {index})'
+    # Walking a whole index is a full scan unless it's the ordering index
+    if any(scanned and not (ordered and name == index) for name, scanned in accesses):
+        return 'INDEX SCAN'
+    return None
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every TaskViewSet filter combination and fail unless it uses the expected index'
+
+    def get_querysets(self):
+        """(label, queryset, expected index, ordered) for each query checked"""
+        factory = APIRequestFactory()
+        for params, index, ordered in FILTER_COMBINATIONS:
+            view = TaskViewSet()
+            view.action = 'list'
+            view.format_kwarg = None
+            view.request = Request(factory.get('/api/tasks/', params))
+            label = '&'.join(f'{key}={value}' for key, value in params.items())
+            yield label, view.get_queryset(), index, ordered
+        yield 'home upcoming', Task.objects.filter(completed=False).order_by('due_date')[:5], 'task_open_due_idx', True
+        # Keyset pages walk their ordering index
+        for name, (field, descending) in KEYSET_ORDERINGS.items():
+            queryset = Task.objects.order_by(*keyset_order_by(field, descending))[:20]
+            yield f'keyset ordering={name}', queryset, KEYSET_INDEXES[name], True
+
+    def handle(self, *args, **options):
+        table = Task._meta.db_table
+        failures = []
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small dev tables make seq scans cheapest; ask whether an index exists at all
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset, index, ordered in self.get_querysets():
+                plan = queryset.explain()
+                problem = check_plan(plan, table, index, ordered)
+                if problem:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'{problem}  {label}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'ok         {label}'))
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) miss their index on {table}: {", ".join(failures)}')
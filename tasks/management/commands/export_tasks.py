@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_tasks
+from tasks.filters import filter_tasks
+from tasks.models import Task
+
+class Command(BaseCommand):
+    help = 'Stream every task (with category and assignee) as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File to write to (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        # Same filters as /api/tasks/
+        parser.add_argument('--search')
+        parser.add_argument('--category')
+        parser.add_argument('--completed', choices=['true', 'false'])
+        parser.add_argument('--priority')
+        parser.add_argument('--upcoming', action='store_true')
+        parser.add_argument('--overdue', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        params = {
+            key: options[key]
+            for key in ('search', 'category', 'completed', 'priority')
+            if options[key]
+        }
+        for flag in ('upcoming', 'overdue'):
+            if options[flag]:
+                params[flag] = '1'
+
+        queryset = filter_tasks(Task.objects.all(), params)
+        lines = export_tasks(queryset, options['format'], options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tasks.search import rebuild_index, search_backend
+
+class Command(BaseCommand):
+    help = 'Repopulate the task full-text search index from the tasks table'
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend == 'sqlite':
+            rebuild_index()
+            self.stdout.write(self.style.SUCCESS('Rebuilt the FTS5 task index'))
+        elif backend == 'postgresql':
+            self.stdout.write('PostgreSQL keeps the search vector up to date itself; nothing to do')
+        else:
+            self.stdout.write('No full-text backend for this database; search uses LIKE')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.counters import recount
+
+class Command(BaseCommand):
+    help = 'Reconcile the denormalized category and task counters with the rows they summarize'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted rows and exit non-zero if there are any',
+        )
+
+    def handle(self, *args, **options):
+        drift = recount(apply=not options['check'])
+        summary = f"{drift['categories']} category row(s), {drift['tasks']} task row(s)"
+
+        if options['check']:
+            if any(drift.values()):
+                raise CommandError(f'Counter drift in {summary}')
+            self.stdout.write(self.style.SUCCESS('Counters are consistent'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Recounted {summary}'))
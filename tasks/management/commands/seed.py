@@ -0,0 +1,328 @@
+import multiprocessing
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, time as datetime_time, timedelta, timezone as dt_timezone
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from tasks.cache import invalidate_tasks
+from tasks.counters import apply_category_deltas, category_deltas
+from tasks.models import Attachment, AttachmentUpload, Category, Comment, Task
+from tasks.search import rebuild_index
+
+# Tasks per unit of work. Fixed so the generated rows don't depend on --workers
+CHUNK_SIZE = 10000
+USER_PREFIX = 'seed-user-'
+
+# Set in worker processes when the database allows only one writer at a time
+_insert_lock = None
+
+PRIORITY_WEIGHTS = [(1, 40), (2, 35), (3, 18), (4, 7)]
+ATTACHMENT_TYPES = [
+    ('png', 'image/png'),
+    ('pdf', 'application/pdf'),
+    ('log', 'text/plain'),
+    ('txt', 'text/plain'),
+    ('zip', 'application/zip'),
+]
+CATEGORY_NAMES = ['Backend', 'Frontend', 'Infra', 'Design', 'Docs', 'Support', 'QA', 'Data', 'Security', 'Mobile']
+COLORS = ['blue', 'green', 'red', 'orange', 'purple', 'gray']
+VERBS = ['Fix', 'Add', 'Remove', 'Refactor', 'Investigate', 'Document', 'Upgrade', 'Test', 'Review', 'Migrate']
+NOUNS = [
+    'login flow', 'search index', 'export', 'billing page', 'cache layer', 'upload form', 'API client',
+    'dashboard', 'email digest', 'permissions', 'onboarding', 'report', 'webhook', 'settings page',
+]
+WORDS = (
+    'the a to and of in for on with this that it is be as at by we should can when after before error '
+    'request response user task page timeout retry crash slow memory query index cache deploy rollback '
+    'fix test review please check again looks good thanks reproduce steps expected actual logs trace'
+).split()
+
+def cumulative(weights):
+    total, result = 0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+def zipf_weights(count):
+    """A few popular rows get most of the references"""
+    return cumulative(1 / (rank + 1) for rank in range(count))
+
+def chunk_rng(seed, kind, index=0):
+    # str seeds hash deterministically, unlike hash() of other objects
+    return random.Random(f'{seed}:{kind}:{index}')
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+def skewed_count(rng, mean, cap):
+    """Exponentially distributed count: most rows get few, some get many"""
+    if mean <= 0:
+        return 0
+    return min(int(rng.expovariate(1 / mean)), cap)
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk_create keep generated timestamps instead of stamping now()"""
+    fields = [
+        Task._meta.get_field('created_at'),
+        Task._meta.get_field('updated_at'),
+        Comment._meta.get_field('created_at'),
+        Attachment._meta.get_field('uploaded_at'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+def build_task(plan, rng, task_id):
+    anchor, days = plan['anchor'], plan['days']
+    # Squaring skews ages towards recent tasks
+    age = days * rng.random() ** 2
+    created_at = anchor - timedelta(days=age)
+    priority = rng.choices(plan['priorities'], cum_weights=plan['priority_weights'])[0]
+    # Older tasks are more likely to be done
+    completed = rng.random() < min(0.95, 0.1 + age / days)
+
+    due_date = None
+    if rng.random() > 0.15:
+        # Urgent work is due sooner
+        due_date = created_at + timedelta(days=rng.expovariate(1 / (7 if priority >= 3 else 30)))
+
+    category_id = None
+    if plan['categories'] and rng.random() > 0.05:
+        category_id = rng.choices(plan['categories'], cum_weights=plan['category_weights'])[0]
+    assigned_to_id = None
+    if plan['users'] and rng.random() > 0.2:
+        assigned_to_id = rng.choices(plan['users'], cum_weights=plan['user_weights'])[0]
+
+    return Task(
+        id=task_id,
+        title=f'{rng.choice(VERBS)} {rng.choice(NOUNS)} #{task_id}',
+        description=sentence(rng, 0, 60),
+        completed=completed,
+        due_date=due_date,
+        created_at=created_at,
+        updated_at=min(anchor, created_at + timedelta(days=rng.random() * (age if completed else 1))),
+        priority=priority,
+        category_id=category_id,
+        assigned_to_id=assigned_to_id,
+    )
+
+def build_children(plan, rng, task):
+    comments, attachments = [], []
+    window = max((plan['anchor'] - task.created_at).total_seconds(), 1)
+    if plan['users']:
+        for _ in range(skewed_count(rng, plan['comments'], 200)):
+            text = sentence(rng, 1, 80)
+            comments.append(Comment(
+                task_id=task.pk,
+                author_id=rng.choices(plan['users'], cum_weights=plan['user_weights'])[0],
+                text=text,
+                word_count=len(text.split()),
+                created_at=task.created_at + timedelta(seconds=rng.random() * window),
+            ))
+    for position in range(skewed_count(rng, plan['attachments'], 20)):
+        extension, content_type = rng.choice(ATTACHMENT_TYPES)
+        attachments.append(Attachment(
+            task_id=task.pk,
+            # Rows only; no bytes are written to storage
+            file=f'attachments/seed/{task.pk}-{position}.{extension}',
+            uploaded_at=task.created_at + timedelta(seconds=rng.random() * window),
+            size=int(rng.lognormvariate(11, 2)),
+            extension=extension,
+            content_type=content_type,
+            content_hash=f'{rng.getrandbits(256):064x}',
+        ))
+    task.comment_count = len(comments)
+    task.attachment_count = len(attachments)
+    return comments, attachments
+
+def init_worker(insert_lock):
+    global _insert_lock
+    _insert_lock = insert_lock
+
+def seed_chunk(plan, index):
+    """
+    Insert one chunk of tasks with their comments and attachments and return
+    (category counter deltas, rows inserted per model).
+    """
+    rng = chunk_rng(plan['seed'], 'tasks', index)
+    first = plan['task_offset'] + index * CHUNK_SIZE + 1
+    last = plan['task_offset'] + min((index + 1) * CHUNK_SIZE, plan['tasks'])
+
+    tasks, comments, attachments = [], [], []
+    for task_id in range(first, last + 1):
+        task = build_task(plan, rng, task_id)
+        task_comments, task_attachments = build_children(plan, rng, task)
+        tasks.append(task)
+        comments += task_comments
+        attachments += task_attachments
+
+    batch_size = plan['batch_size']
+    # Generation above runs in parallel; SQLite inserts take turns
+    with _insert_lock or nullcontext(), explicit_timestamps(), transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=batch_size)
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+        Attachment.objects.bulk_create(attachments, batch_size=batch_size)
+
+    deltas = category_deltas(added=[(task.category_id, task.completed, task.priority) for task in tasks])
+    return deltas, {'tasks': len(tasks), 'comments': len(comments), 'attachments': len(attachments)}
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible load-testing dataset: users, categories, and tasks with skewed priority, '
+        'due-date and completion distributions, plus comments and attachment rows. The same --seed and '
+        '--anchor always produce the same rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--comments', type=float, default=3, help='Mean comments per task')
+        parser.add_argument('--attachments', type=float, default=0.3, help='Mean attachments per task')
+        parser.add_argument('--days', type=int, default=365, help='Tasks are created over this many days')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--anchor', help='Date the data is generated relative to (YYYY-MM-DD, default today)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes inserting task chunks in parallel')
+        parser.add_argument('--clear', action='store_true', help='Delete all tasks, categories and seeded users first')
+
+    def handle(self, *args, **options):
+        anchor_date = parse_date(options['anchor']) if options['anchor'] else timezone.now().date()
+        if anchor_date is None:
+            raise CommandError('--anchor must be a date like 2025-01-31')
+        anchor = datetime.combine(anchor_date, datetime_time(), tzinfo=dt_timezone.utc)
+
+        if options['clear']:
+            self.clear()
+        started = time.perf_counter()
+        seed = options['seed']
+        users = self.create_users(seed, options['users'])
+        categories = self.create_categories(seed, options['categories'])
+
+        priorities, weights = zip(*PRIORITY_WEIGHTS)
+        plan = {
+            'seed': seed,
+            'anchor': anchor,
+            'days': max(options['days'], 1),
+            'tasks': options['tasks'],
+            'task_offset': Task.objects.aggregate(last=Max('id'))['last'] or 0,
+            'comments': options['comments'],
+            'attachments': options['attachments'],
+            'batch_size': options['batch_size'],
+            'priorities': priorities,
+            'priority_weights': cumulative(weights),
+            'users': users,
+            'user_weights': zipf_weights(len(users)),
+            'categories': categories,
+            'category_weights': zipf_weights(len(categories)),
+        }
+
+        totals = self.seed_tasks(plan, options['workers'])
+        self.finish(categories)
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values()) + len(users) + len(categories)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {len(categories)} categories, {totals["tasks"]} tasks, '
+            f'{totals["comments"]} comments and {totals["attachments"]} attachments '
+            f'(seed {seed}, anchor {anchor_date}) in {elapsed:.1f}s, {rows / elapsed:.0f} rows/s'
+        ))
+
+    def clear(self):
+        # Raw deletes: the ORM would load every row to run the delete signals
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (Comment, Attachment, AttachmentUpload, Task, Category):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+        rebuild_index()
+
+    def create_users(self, seed, count):
+        offset = User.objects.filter(username__startswith=USER_PREFIX).count()
+        rng = chunk_rng(seed, 'users')
+        users = [
+            User(
+                username=f'{USER_PREFIX}{offset + n}',
+                first_name=rng.choice(['Ada', 'Alan', 'Grace', 'Linus', 'Barbara', 'Ken', 'Margaret', 'Dennis']),
+                email=f'{USER_PREFIX}{offset + n}@example.com',
+                password='!',  # unusable
+            )
+            for n in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=1000)
+        return list(
+            User.objects.filter(username__in=[user.username for user in users]).order_by('id').values_list('id', flat=True)
+        )
+
+    def create_categories(self, seed, count):
+        rng = chunk_rng(seed, 'categories')
+        categories = Category.objects.bulk_create([
+            Category(
+                name=f'{CATEGORY_NAMES[n % len(CATEGORY_NAMES)]} {n // len(CATEGORY_NAMES) + 1}',
+                description=sentence(rng, 0, 20),
+                color=rng.choice(COLORS),
+            )
+            for n in range(count)
+        ])
+        if categories and categories[0].pk is None:
+            # Backends that can't return ids from bulk inserts
+            return list(Category.objects.order_by('-id').values_list('id', flat=True)[:count])[::-1]
+        return [category.pk for category in categories]
+
+    def seed_tasks(self, plan, workers):
+        chunks = range((plan['tasks'] + CHUNK_SIZE - 1) // CHUNK_SIZE)
+        deltas = defaultdict(lambda: defaultdict(int))
+        totals = {'tasks': 0, 'comments': 0, 'attachments': 0}
+
+        if workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self.stderr.write('Parallel seeding needs the fork start method; using one process')
+            workers = 1
+
+        if workers > 1:
+            context = multiprocessing.get_context('fork')
+            insert_lock = context.Lock() if connection.vendor == 'sqlite' else None
+            # Children must open their own connections
+            connections.close_all()
+            with context.Pool(workers, initializer=init_worker, initargs=(insert_lock,)) as pool:
+                results = pool.imap_unordered(partial(seed_chunk, plan), chunks)
+                self.collect(results, deltas, totals, plan['tasks'])
+        else:
+            self.collect((seed_chunk(plan, index) for index in chunks), deltas, totals, plan['tasks'])
+
+        apply_category_deltas(deltas)
+        if connection.vendor == 'postgresql':
+            # Explicit ids don't advance the sequence
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Task]):
+                    cursor.execute(sql)
+        return totals
+
+    def collect(self, results, deltas, totals, total_tasks):
+        for chunk_deltas, counts in results:
+            for category_id, counters in chunk_deltas.items():
+                for field, value in counters.items():
+                    deltas[category_id][field] += value
+            for name, count in counts.items():
+                totals[name] += count
+            self.stdout.write(f'  {totals["tasks"]}/{total_tasks} tasks')
+
+    def finish(self, categories):
+        # bulk_create skips the signal handlers that keep these up to date
+        rebuild_index()
+        invalidate_tasks(category_ids=categories)
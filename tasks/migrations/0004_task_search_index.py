@@ -0,0 +1,48 @@
+from django.db import migrations
+
+FTS_TABLE = 'tasks_task_fts'
+SEARCH_VECTOR_COLUMN = 'search_vector'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description) "
+            f"SELECT id, title, description FROM tasks_task"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"ALTER TABLE tasks_task ADD COLUMN {SEARCH_VECTOR_COLUMN} tsvector "
+            f"GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+            f") STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX task_search_vector_idx ON tasks_task USING GIN ({SEARCH_VECTOR_COLUMN})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS task_search_vector_idx")
+        schema_editor.execute(f"ALTER TABLE tasks_task DROP COLUMN IF EXISTS {SEARCH_VECTOR_COLUMN}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, group_by):
+    counted = queryset.order_by().values(group_by).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counted), Value(0))
+
+
+def populate_counters(apps, schema_editor):
+    Category = apps.get_model('tasks', 'Category')
+    Task = apps.get_model('tasks', 'Task')
+    Comment = apps.get_model('tasks', 'Comment')
+    Attachment = apps.get_model('tasks', 'Attachment')
+    db_alias = schema_editor.connection.alias
+
+    tasks = Task.objects.filter(category=OuterRef('pk'))
+    Category.objects.using(db_alias).update(
+        task_count=count(tasks, 'category'),
+        completed_count=count(tasks.filter(completed=True), 'category'),
+        low_count=count(tasks.filter(priority=1), 'category'),
+        medium_count=count(tasks.filter(priority=2), 'category'),
+        high_count=count(tasks.filter(priority=3), 'category'),
+        critical_count=count(tasks.filter(priority=4), 'category'),
+    )
+    Task.objects.using(db_alias).update(
+        comment_count=count(Comment.objects.filter(task=OuterRef('pk')), 'task'),
+        attachment_count=count(Attachment.objects.filter(task=OuterRef('pk')), 'task'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_attachment_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='completed_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='critical_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='high_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='low_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='medium_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='task_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='attachment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:32
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_word_counts(apps, schema_editor):
+    comments = apps.get_model('tasks', 'Comment').objects.using(schema_editor.connection.alias)
+    batch = []
+    for comment in comments.only('id', 'text').order_by('id').iterator(chunk_size=BATCH_SIZE):
+        comment.word_count = len((comment.text or '').split())
+        batch.append(comment)
+        if len(batch) >= BATCH_SIZE:
+            comments.bulk_update(batch, ['word_count'])
+            batch = []
+    if batch:
+        comments.bulk_update(batch, ['word_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_denormalized_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_word_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_comment_word_count'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_completed_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_cat_done_prio_idx',
+        ),
+    ]
@@ -1,43 +1,104 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Q, Value, When
 from django.contrib.auth.models import User
 from django.utils import timezone
 import os
+import uuid
 
-class Category(models.Model):
+class CounterFieldsMixin:
+    """
+    Denormalized counters only ever change through F() updates (see
+    tasks/counters.py), so saving an existing row must not write back the
+    possibly stale copies loaded into memory.
+    """
+    counter_fields = ()
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        # Counter signal handlers run inside the same transaction as the write
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class Category(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     color = models.CharField(max_length=20, default="blue")
+    # Maintained incrementally; `manage.py recount` reconciles them
+    task_count = models.IntegerField(default=0, editable=False)
+    completed_count = models.IntegerField(default=0, editable=False)
+    low_count = models.IntegerField(default=0, editable=False)
+    medium_count = models.IntegerField(default=0, editable=False)
+    high_count = models.IntegerField(default=0, editable=False)
+    critical_count = models.IntegerField(default=0, editable=False)
+    
+    counter_fields = (
+        'task_count', 'completed_count', 'low_count', 'medium_count', 'high_count', 'critical_count'
+    )
     
     def __str__(self):
         return self.name
     
     def get_task_count(self):
-        return self.task_set.count()
+        return self.task_count
+    
+    def get_statistics(self):
+        from .services import statistics_from_counters
+        return statistics_from_counters(self)
     
     def get_completed_percentage(self):
-        total = self.task_set.count()
-        if total == 0:
+        if self.task_count == 0:
             return 0
-        completed = self.task_set.filter(completed=True).count()
-        return (completed / total) * 100
+        return (self.completed_count / self.task_count) * 100
     
     def get_average_priority(self):
         """Calculate average priority with a ZeroDivisionError bug"""
-        tasks = self.task_set.all()
-        priority_sum = sum(task.priority for task in tasks)
+        stats = self.get_statistics()
         # Will cause ZeroDivisionError if category has no tasks
-        return priority_sum / tasks.count()  
+        return stats['priority_sum'] / stats['total']
 
     def get_completion_stats(self):
         """Get completion statistics with KeyError bug"""
+        statistics = self.get_statistics()
         stats = {
-            'total': self.task_set.count(),
-            'completed': self.task_set.filter(completed=True).count(),
+            'total': statistics['total'],
+            'completed': statistics['completed'],
         }
         # KeyError: 'completion_percentage' - this key doesn't exist
         return stats['completion_percentage']
 
-class Task(models.Model):
+class TaskQuerySet(models.QuerySet):
+    def toggle_completed(self, pk):
+        """
+        Flip `completed` with a single conditional UPDATE and return the new
+        state, or None if the task doesn't exist. The row stays locked until
+        the read-back commits, so concurrent toggles are never lost.
+        """
+        from .cache import invalidate_tasks
+        from .counters import update_category_counters
+
+        with transaction.atomic():
+            updated = self.filter(pk=pk).update(
+                completed=Case(When(completed=True, then=Value(False)), default=Value(True)),
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                return None
+            completed, category_id, priority = (
+                self.filter(pk=pk).values_list('completed', 'category_id', 'priority').get()
+            )
+            update_category_counters(
+                removed=[(category_id, not completed, priority)],
+                added=[(category_id, completed, priority)],
+            )
+        # update() bypasses post_save, so invalidate cached reads here
+        invalidate_tasks([pk], [category_id])
+        return completed
+
+class Task(CounterFieldsMixin, models.Model):
     PRIORITY_CHOICES = [
         (1, 'Low'),
         (2, 'Medium'),
@@ -54,6 +115,25 @@ class Task(models.Model):
     priority = models.IntegerField(choices=PRIORITY_CHOICES, default=2)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    comment_count = models.IntegerField(default=0, editable=False)
+    attachment_count = models.IntegerField(default=0, editable=False)
+    
+    objects = TaskQuerySet.as_manager()
+    counter_fields = ('comment_count', 'attachment_count')
+    
+    class Meta:
+        # Matched to the TaskViewSet filters, home() and keyset pagination;
+        # `manage.py explain_task_queries` checks which index each query
+        # uses. Category filters are served by the category FK index.
+        indexes = [
+            models.Index(fields=['priority', 'completed'], name='task_priority_done_idx'),
+            models.Index(fields=['due_date', 'id'], name='task_due_date_idx'),
+            models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+            models.Index(fields=['due_date'], condition=Q(completed=False), name='task_open_due_idx'),
+            # SQLite renders completed=True as a bare column test that the
+            # composite index can't serve, so completed rows get their own
+            models.Index(fields=['due_date'], condition=Q(completed=True), name='task_done_due_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -69,8 +149,10 @@ class Task(models.Model):
         return self.due_date < timezone.now()
     
     def toggle_completed(self):
-        self.completed = not self.completed
-        self.save()
+        completed = Task.objects.toggle_completed(self.pk)
+        if completed is None:
+            raise Task.DoesNotExist(f'Task {self.pk} no longer exists')
+        self.completed = completed
         return self.completed
     
     def is_high_priority(self):
@@ -118,10 +200,22 @@ class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Stored at write time so reads and averages never split the text
+    word_count = models.PositiveIntegerField(default=0, editable=False)
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.word_count = self.get_word_count()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'word_count'}
+        # Keep the task's comment_count update in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     def get_word_count(self):
         # This will cause an AttributeError if text is None
         return len(self.text.split())
@@ -131,14 +225,61 @@ class Attachment(models.Model):
     file = models.FileField(upload_to='attachments/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     description = models.CharField(max_length=255, blank=True)
+    # Recorded once at upload so reads never have to touch storage
+    size = models.BigIntegerField(null=True, blank=True, editable=False)
+    extension = models.CharField(max_length=32, blank=True, editable=False)
+    content_type = models.CharField(max_length=255, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     def __str__(self):
         return f"Attachment for {self.task.title}"
     
+    def save(self, *args, **kwargs):
+        # A new upload hasn't been committed to storage yet
+        if self.file and not getattr(self.file, '_committed', True):
+            self.populate_metadata()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {
+                    'size', 'extension', 'content_type', 'content_hash'
+                }
+        # Keep the task's attachment_count update in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def populate_metadata(self):
+        from .attachments import compute_file_metadata
+        for field, value in compute_file_metadata(self.file).items():
+            setattr(self, field, value)
+    
+    def has_metadata(self):
+        return self.size is not None
+    
     def file_size(self):
+        if self.has_metadata():
+            return self.size
         # This will raise an exception if the file doesn't exist
         return self.file.size
     
     def file_extension(self):
+        if self.has_metadata():
+            return self.extension
         # This will cause an IndexError if there's no '.' in the filename
-        return self.file.name.split('.')[-1]
\ No newline at end of file
+        return self.file.name.split('.')[-1]
+
+class AttachmentUpload(models.Model):
+    """A resumable chunked upload being assembled on the server"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='pending_uploads')
+    filename = models.CharField(max_length=255)
+    description = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=255, blank=True)
+    total_size = models.BigIntegerField(null=True, blank=True)
+    received = models.BigIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.received} bytes received)"
+    
+    def temporary_path(self):
+        from .attachments import upload_temp_path
+        return upload_temp_path(self)
@@ -0,0 +1,201 @@
+from django.core import signing
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+# Keyset orderings: name -> (field, descending). The primary key is always
+# used as the tie-breaker so every position in the ordering is unique.
+KEYSET_ORDERINGS = {
+    'created': ('created_at', True),
+    'due': ('due_date', False),
+}
+DEFAULT_KEYSET_ORDERING = 'created'
+CURSOR_SALT = 'tasks.pagination.cursor'
+
+class InvalidCursor(Exception):
+    pass
+
+def keyset_requested(params):
+    """Keyset pagination is opt-in via ?pagination=keyset or a cursor"""
+    return params.get('pagination') == 'keyset' or 'cursor' in params
+
+def encode_cursor(ordering, value, pk, backwards=False):
+    if value is not None:
+        value = value.isoformat()
+    return signing.dumps(
+        {'o': ordering, 'v': value, 'pk': pk, 'b': backwards},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+def decode_cursor(token):
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+        ordering = payload['o']
+        value = payload['v']
+        pk = int(payload['pk'])
+        backwards = bool(payload['b'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+    if ordering not in KEYSET_ORDERINGS:
+        raise InvalidCursor('Invalid cursor')
+    if value is not None:
+        value = parse_datetime(value)
+        if value is None:
+            raise InvalidCursor('Invalid cursor')
+    return ordering, value, pk, backwards
+
+def keyset_order_by(field, descending, backwards=False):
+    """Rows without a value always sort after the rows that have one"""
+    descending = descending != backwards
+    nulls = {'nulls_first': True} if backwards else {'nulls_last': True}
+    expression = F(field).desc(**nulls) if descending else F(field).asc(**nulls)
+    return [expression, '-id' if descending else 'id']
+
+def keyset_filter(field, descending, value, pk, backwards=False):
+    """Rows strictly after (value, pk) in the walking direction"""
+    lookup = 'lt' if descending != backwards else 'gt'
+    if value is None:
+        condition = Q(**{f'{field}__isnull': True, f'id__{lookup}': pk})
+        if backwards:
+            condition |= Q(**{f'{field}__isnull': False})
+        return condition
+    condition = Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+    if not backwards:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+def approximate_count(queryset, limit=1000):
+    """
+    Cheap row count. On PostgreSQL an unfiltered table uses the planner's
+    estimate; otherwise counting stops after `limit` rows.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    return queryset.order_by()[:limit].count()
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+class KeysetPaginator:
+    """
+    Seek-method pagination on (field, id). Each page is a range scan from
+    the previous position, so deep pages cost the same as the first one.
+    """
+
+    def __init__(self, queryset, page_size, ordering=DEFAULT_KEYSET_ORDERING, count_limit=None):
+        if ordering not in KEYSET_ORDERINGS:
+            ordering = DEFAULT_KEYSET_ORDERING
+        self.queryset = queryset
+        self.page_size = page_size
+        self.ordering = ordering
+        self.count_limit = count_limit
+
+    def get_page(self, cursor=None):
+        ordering, value, pk, backwards = self.ordering, None, None, False
+        if cursor:
+            ordering, value, pk, backwards = decode_cursor(cursor)
+        field, descending = KEYSET_ORDERINGS[ordering]
+
+        queryset = self.queryset.order_by(*keyset_order_by(field, descending, backwards))
+        if cursor:
+            queryset = queryset.filter(keyset_filter(field, descending, value, pk, backwards))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        has_next = has_more if not backwards else bool(cursor)
+        has_previous = bool(cursor) if not backwards else has_more
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            last = rows[-1]
+            next_cursor = encode_cursor(ordering, getattr(last, field), last.pk)
+        if rows and has_previous:
+            first = rows[0]
+            previous_cursor = encode_cursor(ordering, getattr(first, field), first.pk, backwards=True)
+
+        count = None
+        if self.count_limit:
+            count = approximate_count(self.queryset, self.count_limit)
+        return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+def get_page_size(params, default, maximum):
+    try:
+        page_size = int(params.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, maximum))
+
+class TaskKeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination for the task API. Without ?pagination=keyset or
+    a cursor the endpoint keeps returning a plain list.
+    """
+    page_size = 20
+    max_page_size = 100
+    count_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if not keyset_requested(params):
+            return None
+
+        self.request = request
+        paginator = KeysetPaginator(
+            queryset,
+            get_page_size(params, self.page_size, self.max_page_size),
+            ordering=params.get('ordering'),
+            count_limit=self.count_limit if params.get('count') == 'approximate' else None,
+        )
+        try:
+            self.page = paginator.get_page(params.get('cursor'))
+        except InvalidCursor as exc:
+            raise NotFound(str(exc))
+        return self.page.object_list
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'pagination')
+        return replace_query_param(url, 'cursor', cursor)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        }
+        if self.page.count is not None:
+            response['approximate_count'] = self.page.count
+        return Response(response)
@@ -0,0 +1,72 @@
+import codecs
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib json module is used instead
+    orjson = None
+
+def orjson_options(indent=False):
+    # OPT_UTC_Z writes UTC datetimes with a trailing 'Z', like DRF's encoder
+    option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return option
+
+def dumps(data, indent=False):
+    """
+    Encode `data` to UTF-8 JSON bytes. Types orjson doesn't know natively
+    (Decimal, lazy strings, querysets, ...) go through DRF's encoder.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data, renderer_context={'indent': 2} if indent else None)
+    return orjson.dumps(data, default=JSONEncoder().default, option=orjson_options(indent))
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed. Output matches the
+    stock renderer except that any indent is rendered as two spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson_options(bool(indent)))
+        # Same as the stock renderer: keep the output safe to embed in JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+class FastJSONParser(JSONParser):
+    """JSONParser backed by orjson when it is installed"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse for the plain Django views, encoded like the API"""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,110 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'tasks_task_fts'
+SEARCH_VECTOR_COLUMN = 'search_vector'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def search_backend():
+    """'sqlite' (FTS5), 'postgresql' (tsvector + GIN) or None for plain LIKE"""
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return connection.vendor
+    return None
+
+def tokenize(query):
+    return TOKEN_RE.findall(query or '')
+
+def build_fts5_query(query):
+    # Quote every token so user input can't inject FTS5 syntax; * makes it a prefix match
+    return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+def build_tsquery(query):
+    return ' & '.join(f'{token}:*' for token in tokenize(query))
+
+def search_tasks(queryset, query):
+    """
+    Filter `queryset` down to tasks matching `query` (every word, prefix
+    matched, over title and description) and annotate a `search_rank`
+    where lower is better. Results are ordered by rank.
+    """
+    backend = search_backend()
+    if not tokenize(query) or backend is None:
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+    table = queryset.model._meta.db_table
+    if backend == 'sqlite':
+        match = build_fts5_query(query)
+        queryset = queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            # bm25() is negative, more negative is a better match; title hits weigh 10x
+            search_rank=RawSQL(
+                f'SELECT bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+                [match],
+                output_field=FloatField(),
+            )
+        )
+    else:
+        tsquery = build_tsquery(query)
+        queryset = queryset.alias(
+            search_match=RawSQL(
+                f'"{table}"."{SEARCH_VECTOR_COLUMN}" @@ to_tsquery(\'english\', %s)',
+                [tsquery],
+                output_field=BooleanField(),
+            )
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                f'-ts_rank("{table}"."{SEARCH_VECTOR_COLUMN}", to_tsquery(\'english\', %s))',
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+    return queryset.order_by('search_rank', 'id')
+
+def index_task(task):
+    """Mirror a saved task into the FTS5 table; PostgreSQL uses a generated column"""
+    if search_backend() != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [task.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [task.pk, task.title, task.description],
+        )
+
+def unindex_task(task_id):
+    unindex_tasks([task_id])
+
+def index_tasks(tasks):
+    """Batch form of index_task for bulk writes, which skip model signals"""
+    if search_backend() != 'sqlite' or not tasks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[task.pk] for task in tasks])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [[task.pk, task.title, task.description] for task in tasks],
+        )
+
+def unindex_tasks(task_ids):
+    if search_backend() != 'sqlite' or not task_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[task_id] for task_id in task_ids])
+
+def rebuild_index(schema_editor=None):
+    """Repopulate the search index from tasks_task in one statement"""
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description) '
+            f'SELECT id, title, description FROM tasks_task'
+        )
@@ -1,13 +1,111 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Task, Category, Comment, Attachment
+from .models import Task, Category, Comment, Attachment, AttachmentUpload
 from django.contrib.auth.models import User
 
+class EagerLoadingMixin:
+    """
+    Derives a select_related/prefetch_related plan from the serializer's
+    declared nested fields, so serializing a list costs a constant number
+    of queries no matter how many rows it returns.
+    """
+
+    @classmethod
+    def get_queryset_annotations(cls):
+        """Annotations the serializer reads instead of issuing per-row queries"""
+        return {}
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, serializer=None):
+        if serializer is None:
+            serializer = cls()
+        annotations = cls.get_queryset_annotations()
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        select_related, prefetch_related = get_eager_loading_plan(serializer)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+def get_eager_loading_plan(serializer, prefix=''):
+    """
+    Walk the serializer fields and return (select_related, prefetch_related).
+
+    Nested to-one serializers are joined with select_related unless they need
+    annotations, in which case they are prefetched with an annotated queryset.
+    Nested many=True serializers are always prefetched, recursively.
+    """
+    select_related = []
+    prefetch_related = []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path = prefix + field.source.replace('.', '__')
+
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            if not isinstance(child, serializers.ModelSerializer):
+                continue
+            queryset = child.Meta.model.objects.all()
+            if isinstance(child, EagerLoadingMixin):
+                queryset = child.setup_eager_loading(queryset, serializer=child)
+            prefetch_related.append(Prefetch(path, queryset=queryset))
+        elif isinstance(field, serializers.ModelSerializer):
+            if isinstance(field, EagerLoadingMixin) and field.get_queryset_annotations():
+                queryset = field.setup_eager_loading(field.Meta.model.objects.all(), serializer=field)
+                prefetch_related.append(Prefetch(path, queryset=queryset))
+                continue
+            select_related.append(path)
+            nested_select, nested_prefetch = get_eager_loading_plan(field, prefix=path + '__')
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+
+    return select_related, prefetch_related
+
+class DynamicFieldsMixin:
+    """
+    Lets the caller choose the response shape. `fields` keeps only the named
+    top-level fields; `expand` names the Meta.expandable_fields to embed.
+    Relations left out of `expand` render as a primary key (to-one) or are
+    dropped (to-many). With neither argument the full shape is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+
+        if expand is not None:
+            for name in getattr(self.Meta, 'expandable_fields', []):
+                if name in expand or name not in self.fields:
+                    continue
+                if isinstance(self.fields[name], serializers.ListSerializer):
+                    self.fields.pop(name)
+                else:
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+def parse_shape_params(params):
+    """Serializer kwargs for ?fields= and ?expand= (comma separated)"""
+    kwargs = {}
+    for name in ('fields', 'expand'):
+        value = params.get(name)
+        if value is not None:
+            kwargs[name] = [item.strip() for item in value.split(',') if item.strip()]
+    return kwargs
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(EagerLoadingMixin, serializers.ModelSerializer):
     task_count = serializers.SerializerMethodField()
     completed_percentage = serializers.SerializerMethodField()
     
@@ -21,38 +119,43 @@ class CategorySerializer(serializers.ModelSerializer):
     def get_completed_percentage(self, obj):
         return obj.get_completed_percentage()
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    word_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Comment
         fields = ['id', 'task', 'author', 'text', 'created_at', 'word_count']
-    
-    def get_word_count(self, obj):
-        return obj.get_word_count()
 
-class AttachmentSerializer(serializers.ModelSerializer):
+class AttachmentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     file_size = serializers.SerializerMethodField()
     file_extension = serializers.SerializerMethodField()
     
     class Meta:
         model = Attachment
-        fields = ['id', 'task', 'file', 'uploaded_at', 'description', 'file_size', 'file_extension']
+        fields = [
+            'id', 'task', 'file', 'uploaded_at', 'description', 'file_size', 'file_extension',
+            'content_type', 'content_hash'
+        ]
     
+    # Read the columns recorded at upload; never stat storage while rendering
     def get_file_size(self, obj):
-        try:
-            return obj.file_size()
-        except Exception:
-            return None
+        return obj.size
     
     def get_file_extension(self, obj):
-        try:
-            return obj.file_extension()
-        except Exception:
-            return None
+        return obj.extension if obj.has_metadata() else None
 
-class TaskSerializer(serializers.ModelSerializer):
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttachmentUpload
+        fields = ['id', 'task', 'filename', 'description', 'content_type', 'total_size', 'received', 'created_at']
+    
+    def validate_filename(self, value):
+        # Checked when the upload starts rather than after every chunk is in
+        if value in ('.', '..') or any(char in value for char in '/\\\0'):
+            raise serializers.ValidationError('Must be a file name without a directory.')
+        return value
+
+class TaskSerializer(DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     assigned_to = UserSerializer(read_only=True)
     days_until_due = serializers.SerializerMethodField()
@@ -68,6 +171,7 @@ class TaskSerializer(serializers.ModelSerializer):
             'assigned_to', 'days_until_due', 'is_overdue',
             'comments', 'attachments'
         ]
+        expandable_fields = ['category', 'assigned_to', 'comments', 'attachments']
     
     def get_days_until_due(self, obj):
         try:
@@ -79,4 +183,28 @@ class TaskSerializer(serializers.ModelSerializer):
         try:
             return obj.is_overdue()
         except Exception:
-            return None
\ No newline at end of file
+            return None
+
+class TaskBulkListSerializer(serializers.ListSerializer):
+    """Validates a batch item by item so one bad row doesn't reject the rest"""
+
+    def partition(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError(
+                {'non_field_errors': [f'Ensure this batch has no more than {self.max_length} items.']}
+            )
+        valid, errors = [], {}
+        for index, item in enumerate(data):
+            try:
+                valid.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+        return valid, errors
+
+class TaskWriteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ['title', 'description', 'completed', 'due_date', 'priority', 'category', 'assigned_to']
+        list_serializer_class = TaskBulkListSerializer
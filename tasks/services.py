@@ -0,0 +1,74 @@
+from django.db.models import Avg, FloatField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Category, Task
+
+PRIORITY_KEYS = {
+    1: 'low',
+    2: 'medium',
+    3: 'high',
+    4: 'critical',
+}
+
+COUNTER_FIELDS = ['id', 'task_count', 'completed_count'] + [f'{key}_count' for key in PRIORITY_KEYS.values()]
+
+def statistics_from_counters(category):
+    """
+    Task statistics derived from a category's denormalized counters (a
+    Category instance or a values() dict); no query against tasks.
+    """
+    get = category.get if isinstance(category, dict) else lambda field: getattr(category, field)
+    total = get('task_count')
+    completed = get('completed_count')
+    breakdown = {key: get(f'{key}_count') for key in PRIORITY_KEYS.values()}
+    priority_sum = sum(priority * breakdown[key] for priority, key in PRIORITY_KEYS.items())
+    return {
+        'total': total,
+        'completed': completed,
+        'completion_percentage': (completed / total) * 100 if total else 0,
+        'priority_sum': priority_sum,
+        'average_priority': priority_sum / total if total else None,
+        'priority_breakdown': breakdown,
+    }
+
+def get_category_statistics(categories):
+    """
+    Statistics for many categories in one query over their counter
+    columns. Accepts Category instances or ids and returns a dict keyed by id.
+    """
+    category_ids = [getattr(category, 'pk', category) for category in categories]
+    if not category_ids:
+        return {}
+    rows = Category.objects.filter(pk__in=category_ids).values(*COUNTER_FIELDS)
+    return {row['id']: statistics_from_counters(row) for row in rows}
+
+def get_single_category_statistics(category):
+    """Statistics for one category, read fresh from its counter columns"""
+    category_id = getattr(category, 'pk', category)
+    return get_category_statistics([category_id])[category_id]
+
+def get_task_statistics(task_ids):
+    """
+    Statistics for many tasks in one query, keyed by id. Comment and
+    attachment counts come from the counter columns and the average
+    comment length from the stored word counts.
+    """
+    if not task_ids:
+        return {}
+    rows = Task.objects.filter(pk__in=task_ids).values(
+        'id', 'comment_count', 'attachment_count', 'completed', 'created_at', 'updated_at',
+    ).annotate(
+        avg_comment_length=Coalesce(Avg('comments__word_count'), Value(0.0), output_field=FloatField()),
+    ).order_by()
+    now = timezone.now()
+    return {
+        row['id']: {
+            'comment_count': row['comment_count'],
+            'attachment_count': row['attachment_count'],
+            'avg_comment_length': row['avg_comment_length'],
+            'days_since_creation': (now - row['created_at']).days,
+            'completion_time': (row['updated_at'] - row['created_at']).days if row['completed'] else None,
+        }
+        for row in rows
+    }
@@ -0,0 +1,141 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_versions
+from .counters import adjust_task_counter, update_category_counters
+from .models import Task, Category, Comment, Attachment
+from .search import index_task, unindex_task
+
+_state = threading.local()
+
+@contextmanager
+def suspend_signal_handlers():
+    """
+    Skip the per-instance handlers below. Bulk operations use this and then
+    update the search index and cache for the whole batch themselves.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+def unless_suspended(handler):
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if getattr(_state, 'suspended', False):
+            return None
+        return handler(*args, **kwargs)
+    return wrapper
+
+@receiver(post_save, sender=Task)
+@unless_suspended
+def update_search_index(sender, instance, **kwargs):
+    index_task(instance)
+
+@receiver(post_delete, sender=Task)
+@unless_suspended
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_task(instance.pk)
+
+def stored_task_state(task_id):
+    """(category_id, completed, priority) as currently stored, or None"""
+    return Task.objects.filter(pk=task_id).values_list('category_id', 'completed', 'priority').first()
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+@unless_suspended
+def remember_previous_state(sender, instance, **kwargs):
+    # Counters and cache invalidation both need what the row looked like before
+    instance._previous_state = stored_task_state(instance.pk) if instance.pk else None
+
+def saved_task_state(instance, update_fields):
+    previous = getattr(instance, '_previous_state', None)
+    state = []
+    for position, field in enumerate(('category', 'completed', 'priority')):
+        if update_fields is None or field in update_fields or previous is None:
+            state.append(getattr(instance, 'category_id' if field == 'category' else field))
+        else:
+            state.append(previous[position])
+    return tuple(state)
+
+@receiver(post_save, sender=Task)
+@unless_suspended
+def update_counters_on_task_save(sender, instance, update_fields=None, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    update_category_counters(
+        removed=[previous] if previous else [],
+        added=[saved_task_state(instance, update_fields)],
+    )
+
+@receiver(post_delete, sender=Task)
+@unless_suspended
+def update_counters_on_task_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    update_category_counters(removed=[previous or (instance.category_id, instance.completed, instance.priority)])
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@unless_suspended
+def invalidate_task_cache(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    resources = ['home', f'task:{instance.pk}']
+    # A task moving between categories invalidates both of them
+    for category_id in (instance.category_id, previous[0] if previous else None):
+        if category_id is not None:
+            resources.append(f'category:{category_id}')
+    bump_versions(*resources)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@unless_suspended
+def invalidate_category_cache(sender, instance, **kwargs):
+    bump_versions('home', f'category:{instance.pk}')
+
+TASK_CHILD_COUNTERS = {
+    Comment: 'comment_count',
+    Attachment: 'attachment_count',
+}
+
+@receiver(pre_save, sender=Comment)
+@receiver(pre_save, sender=Attachment)
+@unless_suspended
+def remember_previous_task(sender, instance, **kwargs):
+    instance._previous_task_id = None
+    if not instance._state.adding:
+        instance._previous_task_id = sender.objects.filter(pk=instance.pk).values_list('task_id', flat=True).first()
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Attachment)
+@unless_suspended
+def update_task_counter_on_save(sender, instance, created, **kwargs):
+    field = TASK_CHILD_COUNTERS[sender]
+    previous_task_id = getattr(instance, '_previous_task_id', None)
+    if created:
+        adjust_task_counter(instance.task_id, field, 1)
+    elif previous_task_id is not None and previous_task_id != instance.task_id:
+        adjust_task_counter(previous_task_id, field, -1)
+        adjust_task_counter(instance.task_id, field, 1)
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Attachment)
+@unless_suspended
+def update_task_counter_on_delete(sender, instance, **kwargs):
+    adjust_task_counter(instance.task_id, TASK_CHILD_COUNTERS[sender], -1)
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+@unless_suspended
+def invalidate_task_children_cache(sender, instance, **kwargs):
+    resources = [f'task:{instance.task_id}']
+    category_id = Task.objects.filter(pk=instance.task_id).values_list('category_id', flat=True).first()
+    if category_id is not None:
+        resources.append(f'category:{category_id}')
+    bump_versions(*resources)
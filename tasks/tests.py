@@ -1,3 +1,888 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from bugtracker.asgi import AsyncRoutesHandler
+
+from . import renderers, views
+from .bulk import bulk_apply_changes, bulk_create_tasks, bulk_delete_tasks, bulk_update_tasks
+from .cache import get_cache, get_cache_stats, reset_cache_stats
+from .counters import recount
+from .db import ReadReplicaRouter, ReplicaRoutingMiddleware, replica_reads
+from .management.commands import benchmark, explain_task_queries
+from .models import Task, Category, Comment, Attachment, AttachmentUpload
+from .services import get_category_statistics
+
+
+class QueryBudgetMixin:
+    def assertQueryBudget(self, budget, url, data=None):
+        """GET `url` and fail if rendering it takes more than `budget` queries"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{url} used {len(queries)} queries:\n' + '\n'.join(query['sql'] for query in queries.captured_queries),
+        )
+        return response
+
+
+class TemporaryMediaRootMixin:
+    """Point MEDIA_ROOT at a fresh directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class TaskApiQueryCountTests(TestCase):
+    def create_tasks(self, count):
+        user = User.objects.create(username=f'user{Task.objects.count()}')
+        category = Category.objects.create(name=f'Category {Task.objects.count()}')
+        for i in range(count):
+            task = Task.objects.create(title=f'Task {i}', category=category, assigned_to=user)
+            Comment.objects.create(task=task, author=user, text='a comment')
+
+    def test_task_list_query_count_is_constant(self):
+        self.create_tasks(2)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(len(response.json()), 2)
+
+        self.create_tasks(10)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(len(response.json()), 12)
+
+    def test_nested_category_counts_come_from_counters(self):
+        self.create_tasks(3)
+        Task.objects.toggle_completed(Task.objects.get(title='Task 0').pk)
+        data = self.client.get('/api/tasks/').json()
+        self.assertEqual(data[0]['category']['task_count'], 3)
+        self.assertAlmostEqual(data[0]['category']['completed_percentage'], 100 / 3)
+
+
+class CategoryStatisticsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Work')
+        for priority, completed in [(1, True), (3, False), (3, True), (4, False)]:
+            Task.objects.create(title='t', category=self.category, priority=priority, completed=completed)
+
+    def test_statistics_endpoint_uses_single_aggregate_query(self):
+        # One query for the category lookup, one for the aggregates
+        with self.assertNumQueries(2):
+            data = self.client.get(f'/api/categories/{self.category.pk}/statistics/').json()
+        self.assertEqual(data['total_tasks'], 4)
+        self.assertEqual(data['completed_tasks'], 2)
+        self.assertEqual(data['completion_percentage'], 50)
+        self.assertEqual(data['priority_breakdown'], {'low': 1, 'medium': 0, 'high': 2, 'critical': 1})
+
+    def test_batch_statistics(self):
+        empty = Category.objects.create(name='Empty')
+        with self.assertNumQueries(1):
+            stats = get_category_statistics([self.category, empty])
+        self.assertEqual(stats[self.category.pk]['average_priority'], 2.75)
+        self.assertEqual(stats[empty.pk]['total'], 0)
+        self.assertIsNone(stats[empty.pk]['average_priority'])
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.get_average_priority(), 2.75)
+
+
+class TaskStatisticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='stats')
+        self.task = Task.objects.create(title='Busy')
+        self.quiet = Task.objects.create(title='Quiet')
+        for text in ['one two', 'one two three four', '  spaced   out  words ']:
+            Comment.objects.create(task=self.task, author=self.user, text=text)
+
+    def test_word_count_is_stored_on_save(self):
+        comment = Comment.objects.get(text='one two')
+        self.assertEqual(comment.word_count, 2)
+        comment.text = 'now five words in here'
+        comment.save(update_fields=['text'])
+        self.assertEqual(Comment.objects.get(pk=comment.pk).word_count, 5)
+
+    def test_statistics_never_loads_comments(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(f'/api/tasks/{self.task.pk}/statistics/').json()
+        self.assertEqual(data['comment_count'], 3)
+        self.assertEqual(data['avg_comment_length'], 3)
+        self.assertEqual(self.client.get(f'/api/tasks/{self.quiet.pk}/statistics/').json()['avg_comment_length'], 0)
+        self.assertEqual(self.client.get('/api/tasks/999999/statistics/').status_code, 404)
+
+    def test_batch_statistics(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/tasks/statistics/', {'ids': f'{self.task.pk},{self.quiet.pk},999999'}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.task.pk, self.quiet.pk])
+        self.assertEqual(data['results'][0]['comment_count'], 3)
+        self.assertEqual(data['not_found'], [999999])
+
+        response = self.client.post(
+            '/api/tasks/statistics/', json.dumps({'ids': [self.quiet.pk]}), content_type='application/json'
+        )
+        self.assertEqual(response.json()['results'][0]['comment_count'], 0)
+        self.assertEqual(self.client.get('/api/tasks/statistics/', {'ids': 'a,b'}).status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(7):
+            # Two tasks share each due date and one has none, to exercise ties and NULLs
+            due_date = now + timedelta(days=i // 2) if i < 6 else None
+            Task.objects.create(title=f'Task {i}', due_date=due_date)
+
+    def walk(self, url):
+        titles = []
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            pages.append(data)
+            titles.extend(task['title'] for task in data['results'])
+            url = data['next']
+        return titles, pages
+
+    def test_walks_every_task_once_in_due_date_order(self):
+        titles, pages = self.walk('/api/tasks/?pagination=keyset&ordering=due&page_size=2')
+        self.assertEqual(titles, [f'Task {i}' for i in range(7)])
+        self.assertEqual(len(pages), 4)
+
+        previous = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual([t['title'] for t in previous['results']], ['Task 4', 'Task 5'])
+
+    def test_created_ordering_is_newest_first(self):
+        titles, _ = self.walk('/api/tasks/?pagination=keyset&page_size=3')
+        self.assertEqual(titles, [f'Task {i}' for i in reversed(range(7))])
+
+    def test_unpaginated_by_default_and_rejects_bad_cursor(self):
+        self.assertEqual(len(self.client.get('/api/tasks/').json()), 7)
+        self.assertEqual(self.client.get('/api/tasks/?cursor=bogus').status_code, 404)
+
+    def test_approximate_count_and_html_list(self):
+        data = self.client.get('/api/tasks/?pagination=keyset&count=approximate').json()
+        self.assertEqual(data['approximate_count'], 7)
+
+        response = self.client.get('/tasks/?pagination=keyset&page_size=5')
+        self.assertEqual(len(response.context['tasks']), 5)
+        self.assertIsNotNone(response.context['next_page_url'])
+
+
+class QueryPlanTests(TestCase):
+    def test_task_filters_use_indexes(self):
+        call_command('explain_task_queries', stdout=StringIO())
+
+    def test_plan_check_requires_the_expected_index(self):
+        check_plan = explain_task_queries.check_plan
+        walk = '5 0 0 SCAN tasks_task USING INDEX task_done_due_idx'
+        search = '5 0 0 SEARCH tasks_task USING INDEX task_priority_done_idx (priority=?)'
+        self.assertIsNone(check_plan(walk, 'tasks_task', 'task_done_due_idx', True))
+        self.assertIsNone(check_plan(search, 'tasks_task', 'task_priority_done_idx', False))
+        self.assertEqual(check_plan('5 0 0 SCAN tasks_task', 'tasks_task', 'task_done_due_idx', True), 'FULL SCAN')
+        self.assertEqual(check_plan(walk, 'tasks_task', 'task_done_due_idx', False), 'INDEX SCAN')
+        self.assertEqual(
+            check_plan(search, 'tasks_task', 'task_open_due_idx', False),
+            'WRONG INDEX (task_priority_done_idx, expected task_open_due_idx)',
+        )
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.title_hit = Task.objects.create(title='Database migration', description='Move data')
+        self.description_hit = Task.objects.create(title='Cleanup', description='Drop old database tables')
+        Task.objects.create(title='Unrelated', description='Nothing to see')
+
+    def search(self, query):
+        return [task['id'] for task in self.client.get('/api/tasks/', {'search': query}).json()]
+
+    def test_ranked_prefix_search(self):
+        self.assertEqual(self.search('datab'), [self.title_hit.pk, self.description_hit.pk])
+        self.assertEqual(self.search('old datab'), [self.description_hit.pk])
+        self.assertEqual(self.search('"quoted'), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.title_hit.title = 'Schema change'
+        self.title_hit.description = ''
+        self.title_hit.save()
+        self.assertEqual(self.search('database'), [self.description_hit.pk])
+
+        self.description_hit.delete()
+        self.assertEqual(self.search('database'), [])
+
+    def test_html_list_uses_index(self):
+        response = self.client.get('/tasks/', {'search': 'tables'})
+        self.assertEqual(list(response.context['tasks']), [self.description_hit])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        reset_cache_stats()
+        self.category = Category.objects.create(name='Work')
+        self.task = Task.objects.create(title='Write docs', category=self.category)
+
+    def test_legacy_task_detail_is_cached_until_task_changes(self):
+        url = f'/api/task/{self.task.pk}/'
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json()['title'], 'Write docs')
+
+        self.task.title = 'Write more docs'
+        self.task.save()
+        self.assertEqual(self.client.get(url).json()['title'], 'Write more docs')
+        self.assertEqual(get_cache_stats()['task_detail'], {'hits': 1, 'misses': 2})
+
+    def test_category_endpoints_follow_task_moves_and_comments(self):
+        other = Category.objects.create(name='Home')
+        stats_url = f'/api/categories/{self.category.pk}/statistics/'
+        tasks_url = f'/api/categories/{self.category.pk}/tasks/'
+        self.assertEqual(self.client.get(stats_url).json()['total_tasks'], 1)
+        self.assertEqual(self.client.get(tasks_url).json()[0]['comments'], [])
+
+        user = User.objects.create(username='reviewer')
+        Comment.objects.create(task=self.task, author=user, text='looks good')
+        self.assertEqual(len(self.client.get(tasks_url).json()[0]['comments']), 1)
+
+        self.task.category = other
+        self.task.save()
+        self.assertEqual(self.client.get(stats_url).json()['total_tasks'], 0)
+        self.assertEqual(self.client.get(f'/api/category/{other.pk}/tasks/').json()['tasks'][0]['id'], self.task.pk)
+
+    def test_padded_category_ids_share_the_invalidated_cache_entry(self):
+        padded_url = f'/api/categories/0{self.category.pk}/statistics/'
+        self.assertEqual(self.client.get(padded_url).json()['total_tasks'], 1)
+        Task.objects.create(title='Another', category=self.category)
+        self.assertEqual(self.client.get(padded_url).json()['total_tasks'], 2)
+        self.assertEqual(self.client.get(f'/api/categories/0{self.category.pk}/tasks/').status_code, 200)
+        self.assertEqual(self.client.get('/api/categories/abc/statistics/').status_code, 404)
+
+
+@override_settings(ROOT_URLCONF='bugtracker.urls_asgi')
+class AsyncReadPathTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.category = Category.objects.create(name='Work')
+        user = User.objects.create(username='async')
+        self.task = Task.objects.create(title='Async', category=self.category, due_date=timezone.now())
+        Comment.objects.create(task=self.task, author=user, text='first')
+
+    def test_async_reads_match_drf(self):
+        # ?format=json routes the same request through the DRF viewset
+        for url in ['/api/tasks/', f'/api/tasks/{self.task.pk}/', '/api/categories/', f'/api/categories/{self.category.pk}/']:
+            for params in [{}, {'fields': 'id,title,comments', 'expand': ''}]:
+                native = self.client.get(url, params)
+                drf = self.client.get(url, {**params, 'format': 'json'})
+                self.assertEqual(native.status_code, 200)
+                self.assertEqual(native.json(), drf.json(), url)
+        missing = self.client.get('/api/tasks/999999/')
+        self.assertEqual((missing.status_code, missing.json()), (404, self.client.get('/api/tasks/999999/', {'format': 'json'}).json()))
+
+    def test_writes_fall_through_to_drf(self):
+        response = self.client.post('/api/categories/', {'name': 'New'})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.patch(
+            f'/api/categories/{self.category.pk}/', json.dumps({'color': 'red'}), content_type='application/json'
+        )
+        self.assertEqual(response.json()['color'], 'red')
+
+    async def test_async_client(self):
+        response = await self.async_client.get(f'/api/task/{self.task.pk}/')
+        self.assertEqual(response.json()['title'], 'Async')
+        response = await self.async_client.get(f'/api/category/{self.category.pk}/tasks/')
+        self.assertEqual(response.json()['tasks'][0]['id'], self.task.pk)
+        response = await self.async_client.get('/api/tasks/')
+        self.assertEqual(response.json()[0]['comments'][0]['text'], 'first')
+        response = await self.async_client.get('/')
+        self.assertContains(response, 'Async')
+
+    @override_settings(ROOT_URLCONF='bugtracker.urls')
+    def test_wsgi_routes_stay_sync(self):
+        for path in ['/', '/api/tasks/', f'/api/tasks/{self.task.pk}/', f'/api/task/{self.task.pk}/']:
+            self.assertFalse(iscoroutinefunction(resolve(path).func), path)
+            self.assertTrue(iscoroutinefunction(resolve(path, 'bugtracker.urls_asgi').func), path)
+
+    async def test_asgi_application_routes_to_async_views(self):
+        request = AsyncRequestFactory().get(f'/api/task/{self.task.pk}/')
+        response = await AsyncRoutesHandler().get_response_async(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(request.resolver_match.func, views.atask_detail)
+
+
+class FastJSONTests(TestCase):
+    data = {
+        'when': timezone.now().replace(microsecond=123456),
+        'price': Decimal('1.50'),
+        'text': 'line\u2028separator',
+        'nested': [{'id': 1, 'ok': True, 'none': None}],
+    }
+
+    def test_matches_stock_renderer(self):
+        stock = JSONRenderer().render(self.data)
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), stock)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), stock)
+
+    def test_parser(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"title": "caf\u00e9", "ids": [1, 2]}'.encode())), {'title': 'café', 'ids': [1, 2]})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"title": NaN}'))
+        response = self.client.post('/api/tasks/bulk/', '[{"title": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_and_legacy_views_use_it(self):
+        task = Task.objects.create(title='Fast', due_date=timezone.now())
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            self.assertEqual(self.client.get('/api/tasks/', {'format': 'json'}).json()[0]['title'], 'Fast')
+            self.assertEqual(self.client.get(f'/api/task/{task.pk}/').json()['title'], 'Fast')
+        self.assertEqual(dumps.call_count, 2)
+
+
+class BulkTaskEndpointTests(TestCase):
+    url = '/api/tasks/bulk/'
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Sprint 1')
+        self.next_category = Category.objects.create(name='Sprint 2')
+
+    def send(self, method, data):
+        return getattr(self.client, method)(self.url, json.dumps(data), content_type='application/json')
+
+    def test_bulk_create_reports_each_item(self):
+        response = self.send('post', [
+            {'title': 'First', 'category': self.category.pk},
+            {'priority': 2},
+            {'title': 'Second', 'priority': 4},
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'error', 'created'])
+        self.assertIn('title', results[1]['errors'])
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(self.client.get('/api/tasks/', {'search': 'second'}).json()[0]['id'], results[2]['id'])
+
+    def test_bulk_move_uses_one_update_and_invalidates_caches(self):
+        created = self.send('post', [{'title': f'T{i}', 'category': self.category.pk} for i in range(50)])
+        ids = [result['id'] for result in created.json()['results']]
+        stats_url = f'/api/categories/{self.category.pk}/statistics/'
+        self.assertEqual(self.client.get(stats_url).json()['total_tasks'], 50)
+
+        response = self.send('patch', {'ids': ids + [999999], 'changes': {'category': self.next_category.pk, 'completed': True}})
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()['results'][-1]['status'], 'not_found')
+        self.assertEqual(Task.objects.filter(category=self.next_category, completed=True).count(), 50)
+        self.assertEqual(self.client.get(stats_url).json()['total_tasks'], 0)
+
+    def test_bulk_per_item_update(self):
+        first, second = Task.objects.bulk_create([Task(title='a'), Task(title='b', priority=1)])
+        response = self.send('patch', [{'id': first.pk, 'title': 'renamed'}, {'id': second.pk, 'priority': 4}])
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.title, first.priority), ('renamed', 2))
+        self.assertEqual((second.title, second.priority), ('b', 4))
+
+    def test_bulk_per_item_update_rejects_repeated_ids(self):
+        task = self.send('post', [{'title': 'a', 'category': self.category.pk}]).json()['results'][0]['id']
+        response = self.send('patch', [
+            {'id': task, 'title': 'renamed'},
+            {'id': task, 'title': 'renamed again', 'category': self.next_category.pk},
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([r['status'] for r in response.json()['results']], ['updated', 'error'])
+        self.assertEqual(Task.objects.get(pk=task).title, 'renamed')
+        self.assertEqual(self.client.get('/api/tasks/', {'search': 'renamed'}).json()[0]['id'], task)
+        self.assertEqual(recount(apply=False), {'categories': 0, 'tasks': 0})
+
+    def test_boolean_ids_are_rejected(self):
+        task = Task.objects.create(title='a')
+        response = self.send('patch', [{'id': True, 'title': 'renamed'}])
+        self.assertEqual(response.json()['results'][0]['status'], 'error')
+        response = self.send('delete', {'ids': [True]})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Task.objects.filter(pk=task.pk, title='a').exists())
+
+    def test_bulk_update_helper_applies_repeated_ids_once(self):
+        task = self.send('post', [{'title': 'a', 'category': self.category.pk}]).json()['results'][0]['id']
+        updated, missing = bulk_update_tasks([
+            (0, task, {'title': 'first', 'completed': True}),
+            (1, task, {'title': 'second', 'category': self.next_category}),
+        ])
+        self.assertEqual((len(updated), missing), (2, []))
+        self.assertEqual(Task.objects.get(pk=task).title, 'second')
+        self.assertEqual(recount(apply=False), {'categories': 0, 'tasks': 0})
+
+        # Counter-only changes: the deltas must be applied once
+        bulk_update_tasks([(0, task, {'completed': False}), (1, task, {'category': self.category})])
+        self.assertEqual(recount(apply=False), {'categories': 0, 'tasks': 0})
+
+    def test_bulk_delete_streams_large_batches(self):
+        user = User.objects.create(username='author')
+        tasks = Task.objects.bulk_create([Task(title=f'T{i}') for i in range(1200)])
+        Comment.objects.create(task=tasks[0], author=user, text='gone with the task')
+        response = self.send('delete', {'ids': [task.pk for task in tasks]})
+        self.assertTrue(response.streaming)
+        results = json.loads(b''.join(response.streaming_content))['results']
+        self.assertEqual(len(results), 1200)
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+
+class AtomicToggleTests(TransactionTestCase):
+    threads = 8
+    toggles_per_thread = 25
+
+    def test_concurrent_toggles_are_never_lost(self):
+        task = Task.objects.create(title='Contended')
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(self.toggles_per_thread):
+                    while True:
+                        try:
+                            results.append(Task.objects.toggle_completed(task.pk))
+                            break
+                        except OperationalError:
+                            # SQLite's shared in-memory test database reports
+                            # lock contention immediately; retry the toggle
+                            continue
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.threads * self.toggles_per_thread
+        self.assertEqual(len(results), total)
+        # Every toggle observed a distinct state transition
+        self.assertEqual(results.count(True), total // 2)
+        task.refresh_from_db()
+        self.assertEqual(task.completed, total % 2 == 1)
+
+    def test_entry_points_share_the_atomic_toggle(self):
+        task = Task.objects.create(title='Toggle me')
+        self.assertTrue(task.toggle_completed())
+        self.assertEqual(self.client.post(f'/api/tasks/{task.pk}/toggle_completed/').json(), {'completed': False})
+        self.client.get(f'/tasks/{task.pk}/toggle-completed/')
+        task.refresh_from_db()
+        self.assertTrue(task.completed)
+        self.assertEqual(self.client.post('/api/tasks/999999/toggle_completed/').status_code, 404)
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='owner')
+        category = Category.objects.create(name='Reports')
+        Task.objects.create(title='Quarterly report', category=category, assigned_to=user, completed=True)
+        Task.objects.create(title='Unfiled')
+
+    def test_ndjson_export_streams_filtered_rows(self):
+        response = self.client.get('/api/tasks/export/', {'completed': 'true'})
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['category'], rows[0]['assigned_to']), ('Reports', 'owner'))
+
+    def test_csv_export_and_command(self):
+        response = self.client.get('/api/tasks/export/', {'export_format': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'title'])
+        self.assertEqual(len(lines), 3)
+
+        output = StringIO()
+        call_command('export_tasks', '--search', 'quarter', stdout=output)
+        self.assertEqual([json.loads(line)['title'] for line in output.getvalue().splitlines()], ['Quarterly report'])
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='dev')
+        category = Category.objects.create(name='Dashboard')
+        for i in range(3):
+            task = Task.objects.create(title=f'Task {i}', category=category, assigned_to=user)
+            Comment.objects.create(task=task, author=user, text='hi')
+
+    def test_fields_only_runs_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/tasks/', {'fields': 'id,title,completed', 'expand': ''}).json()
+        self.assertEqual(set(data[0]), {'id', 'title', 'completed'})
+
+    def test_unexpanded_relations_render_as_ids(self):
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/tasks/', {'expand': 'comments'}).json()
+        task = data[0]
+        self.assertIsInstance(task['category'], int)
+        self.assertIsInstance(task['assigned_to'], int)
+        self.assertEqual(task['comments'][0]['author']['username'], 'dev')
+        self.assertNotIn('attachments', task)
+
+    def test_retrieve_accepts_shape_params(self):
+        task = Task.objects.first()
+        data = self.client.get(f'/api/tasks/{task.pk}/', {'fields': 'id,category', 'expand': 'category'}).json()
+        self.assertEqual(data['category']['name'], 'Dashboard')
+
+
+class AttachmentMetadataTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(title='With files')
+
+    def test_metadata_recorded_at_upload_and_read_without_storage(self):
+        upload = SimpleUploadedFile('notes.TXT', b'hello world', content_type='text/plain')
+        response = self.client.post('/api/attachments/', {'task': self.task.pk, 'file': upload})
+        self.assertEqual(response.status_code, 201)
+        attachment = Attachment.objects.get()
+        self.assertEqual((attachment.size, attachment.extension, attachment.content_type), (11, 'txt', 'text/plain'))
+        self.assertEqual(attachment.content_hash, hashlib.sha256(b'hello world').hexdigest())
+
+        # Rendering must not stat the file, so it still works once the file is gone
+        os.remove(attachment.file.path)
+        data = self.client.get(f'/api/tasks/{self.task.pk}/').json()
+        self.assertEqual(data['attachments'][0]['file_size'], 11)
+        self.assertEqual(data['attachments'][0]['file_extension'], 'txt')
+
+    def test_backfill_command(self):
+        attachment = Attachment.objects.create(task=self.task, file=SimpleUploadedFile('old.csv', b'a,b\n'))
+        Attachment.objects.filter(pk=attachment.pk).update(size=None, extension='', content_type='', content_hash='')
+        call_command('backfill_attachment_metadata', stdout=StringIO())
+        attachment.refresh_from_db()
+        self.assertEqual((attachment.size, attachment.extension, attachment.content_type), (4, 'csv', 'text/csv'))
+
+
+class AttachmentTransferTests(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(title='Large files')
+        self.payload = bytes(range(256)) * 40
+
+    def put_chunk(self, upload_id, start, end, total='*'):
+        return self.client.put(
+            f'/api/attachment-uploads/{upload_id}/',
+            self.payload[start:end + 1],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}',
+        )
+
+    def upload(self):
+        upload_id = self.client.post(
+            '/api/attachment-uploads/', {'task': self.task.pk, 'filename': 'dump.bin'}
+        ).json()['id']
+        self.assertEqual(self.put_chunk(upload_id, 0, 4095).json()['received'], 4096)
+        # A retried or skipped chunk is rejected with the offset to resume from
+        conflict = self.put_chunk(upload_id, 0, 4095)
+        self.assertEqual((conflict.status_code, conflict.json()['received']), (409, 4096))
+        self.put_chunk(upload_id, 4096, len(self.payload) - 1, total=len(self.payload))
+        response = self.client.post(f'/api/attachment-uploads/{upload_id}/complete/')
+        self.assertEqual(response.status_code, 201)
+        return Attachment.objects.get(pk=response.json()['id'])
+
+    def test_chunked_upload_is_assembled(self):
+        attachment = self.upload()
+        with attachment.file.open('rb') as file:
+            self.assertEqual(file.read(), self.payload)
+        self.assertEqual(attachment.size, len(self.payload))
+        self.assertEqual(attachment.content_hash, hashlib.sha256(self.payload).hexdigest())
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'attachment-uploads')))
+
+    def test_upload_to_storage_that_copies_the_stream(self):
+        class CopyingStorage(InMemoryStorage):
+            """Reads from the file's current position, as S3-style backends do"""
+            def _save(self, name, content):
+                return super()._save(name, ContentFile(content.read()))
+
+        with mock.patch.object(Attachment._meta.get_field('file'), 'storage', CopyingStorage()):
+            attachment = self.upload()
+            with attachment.file.open('rb') as file:
+                self.assertEqual(file.read(), self.payload)
+
+    def test_upload_filename_must_be_a_basename(self):
+        for filename in ('../dump.bin', 'nested/dump.bin', 'C:\\dump.bin', '..'):
+            with self.subTest(filename=filename):
+                response = self.client.post('/api/attachment-uploads/', {'task': self.task.pk, 'filename': filename})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('filename', response.json())
+        self.assertFalse(AttachmentUpload.objects.exists())
+
+    def test_range_download(self):
+        attachment = self.upload()
+        url = f'/api/attachments/{attachment.pk}/download/'
+
+        full = self.client.get(url)
+        self.assertEqual(b''.join(full.streaming_content), self.payload)
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(b''.join(partial.streaming_content), self.payload[100:200])
+
+        suffix = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(suffix.streaming_content), self.payload[-10:])
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=999999-').status_code, 416)
+
+    def test_sendfile_mode(self):
+        attachment = self.upload()
+        with self.settings(ATTACHMENT_SENDFILE_MODE='x-accel-redirect'):
+            response = self.client.get(f'/api/attachments/{attachment.pk}/download/')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{attachment.file.name}')
+
+
+class CounterConsistencyTests(TemporaryMediaRootMixin, TestCase):
+    """Random sequences of writes must leave every counter equal to a fresh count"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='counter')
+        self.categories = [Category.objects.create(name=f'C{i}') for i in range(3)]
+
+    def random_state(self, rng):
+        return {
+            'category': rng.choice(self.categories + [None]),
+            'completed': rng.random() < 0.5,
+            'priority': rng.randint(1, 4),
+        }
+
+    def run_operation(self, rng):
+        task_ids = list(Task.objects.values_list('pk', flat=True))
+        operation = rng.choice([
+            'create', 'create', 'toggle', 'save', 'save_fields', 'delete', 'bulk_create',
+            'bulk_update', 'bulk_apply', 'bulk_delete', 'comment', 'uncomment', 'attach', 'move_child',
+        ])
+        if operation == 'create' or not task_ids:
+            Task.objects.create(title='t', **self.random_state(rng))
+        elif operation == 'toggle':
+            Task.objects.get(pk=rng.choice(task_ids)).toggle_completed()
+        elif operation == 'save':
+            task = Task.objects.get(pk=rng.choice(task_ids))
+            for field, value in self.random_state(rng).items():
+                setattr(task, field, value)
+            task.save()
+        elif operation == 'save_fields':
+            # Only the listed field is written; the others change in memory only
+            task = Task.objects.get(pk=rng.choice(task_ids))
+            for field, value in self.random_state(rng).items():
+                setattr(task, field, value)
+            task.save(update_fields=[rng.choice(['category', 'completed', 'priority'])])
+        elif operation == 'delete':
+            Task.objects.get(pk=rng.choice(task_ids)).delete()
+        elif operation == 'bulk_create':
+            bulk_create_tasks([(i, dict(title='b', **self.random_state(rng))) for i in range(rng.randint(1, 5))])
+        elif operation == 'bulk_update':
+            chosen = rng.sample(task_ids, min(len(task_ids), 3))
+            bulk_update_tasks([(i, pk, self.random_state(rng)) for i, pk in enumerate(chosen)])
+        elif operation == 'bulk_apply':
+            state = self.random_state(rng)
+            changes = {field: state[field] for field in rng.sample(sorted(state), 2)}
+            bulk_apply_changes(rng.sample(task_ids, min(len(task_ids), 4)), changes)
+        elif operation == 'bulk_delete':
+            bulk_delete_tasks(rng.sample(task_ids, min(len(task_ids), 2)))
+        elif operation == 'comment':
+            Comment.objects.create(task_id=rng.choice(task_ids), author=self.user, text='x')
+        elif operation == 'uncomment':
+            comment = Comment.objects.order_by('?').first()
+            if comment:
+                comment.delete()
+        elif operation == 'attach':
+            Attachment.objects.create(task_id=rng.choice(task_ids), file=SimpleUploadedFile('a.txt', b'data'))
+        elif operation == 'move_child':
+            comment = Comment.objects.order_by('?').first()
+            if comment:
+                comment.task_id = rng.choice(task_ids)
+                comment.save()
+
+    def test_random_operations_never_drift(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            for step in range(40):
+                self.run_operation(rng)
+                self.assertEqual(recount(apply=False), {'categories': 0, 'tasks': 0}, f'seed {seed}, step {step}')
+
+    def test_recount_repairs_drift(self):
+        task = Task.objects.create(title='t', category=self.categories[0], priority=4)
+        Comment.objects.create(task=task, author=self.user, text='x')
+        self.assertEqual(Category.objects.get(pk=self.categories[0].pk).critical_count, 1)
+
+        # Writes that bypass the model layer leave the counters stale
+        Task.objects.filter(pk=task.pk).update(category=self.categories[1])
+        Task.objects.filter(pk=task.pk).update(comment_count=5)
+        with self.assertRaises(CommandError):
+            call_command('recount', '--check', stdout=StringIO())
+
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('2 category row(s), 1 task row(s)', out.getvalue())
+        self.assertEqual(recount(apply=False), {'categories': 0, 'tasks': 0})
+        self.assertEqual(Task.objects.get(pk=task.pk).comment_count, 1)
+
+
+class PageRenderingTests(QueryBudgetMixin, TestCase):
+    # Page -> queries allowed, however many tasks and categories there are
+    budgets = [
+        ('/', None, 2),
+        ('/tasks/', None, 3),
+        ('/tasks/', {'search': 'task'}, 3),
+        ('/tasks/', {'pagination': 'keyset'}, 2),
+        ('/categories/', None, 1),
+    ]
+
+    def setUp(self):
+        get_cache().clear()
+
+    def create_tasks(self, count):
+        for i in range(count):
+            category = Category.objects.create(name=f'Category {i}')
+            Task.objects.create(title=f'Task {i}', category=category, due_date=timezone.now())
+
+    def test_pages_render_within_budget(self):
+        for count in (1, 12):
+            self.create_tasks(count)
+            for url, data, budget in self.budgets:
+                with self.subTest(url=url, data=data, tasks=count):
+                    self.assertQueryBudget(budget, url, data)
+
+    def test_task_cards_are_cached_per_version(self):
+        task = Task.objects.create(title='Cached card', category=Category.objects.create(name='Ops'))
+        self.client.get('/tasks/')
+        # A write that bypasses save() leaves updated_at, and so the cached card, alone
+        Task.objects.filter(pk=task.pk).update(title='Sneaky')
+        self.assertContains(self.client.get('/tasks/'), 'Cached card')
+
+        task.refresh_from_db()
+        task.title = 'Renamed'
+        task.save()
+        self.assertContains(self.client.get('/tasks/'), 'Renamed')
+
+        Category.objects.filter(pk=task.category_id).update(name='Platform')
+        self.assertContains(self.client.get('/tasks/'), 'Platform')
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_pragmas_applied_on_connect(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_benchmark_db_requires_sqlite(self):
+        postgres = mock.Mock(vendor='postgresql')
+        with mock.patch('tasks.management.commands.benchmark_db.connection', postgres):
+            with self.assertRaisesMessage(CommandError, 'needs a SQLite default database, not postgresql'):
+                call_command('benchmark_db', stdout=StringIO())
+
+    def test_replica_router(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_read(Task), 'default')
+        with replica_reads():
+            # TestCase wraps each test in a transaction, which pins reads to the primary
+            self.assertEqual(router.db_for_read(Task), 'default')
+        self.assertTrue(router.allow_migrate('default', 'tasks'))
+        self.assertFalse(router.allow_migrate('replica', 'tasks'))
+
+    def test_safe_requests_read_from_replica_until_they_write(self):
+        router = ReadReplicaRouter()
+        seen = []
+
+        def view(request):
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                seen.append(router.db_for_read(Task))
+                router.db_for_write(Task)
+                seen.append(router.db_for_read(Task))
+            return None
+
+        factory = RequestFactory()
+        ReplicaRoutingMiddleware(view)(factory.get('/api/tasks/'))
+        ReplicaRoutingMiddleware(view)(factory.post('/api/tasks/'))
+        self.assertEqual(seen, ['replica', 'default', 'default', 'default'])
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, *args):
+        call_command(
+            'seed', '--clear', '--users', '5', '--categories', '3', '--tasks', '60', '--anchor', '2025-06-01',
+            *args, stdout=StringIO(),
+        )
+        return (
+            list(Task.objects.order_by('pk').values_list(
+                'title', 'priority', 'completed', 'due_date', 'created_at', 'category__name', 'assigned_to__username',
+            )),
+            list(Comment.objects.order_by('pk').values_list('task_id', 'author__username', 'text', 'word_count')),
+        )
+
+    def test_same_seed_same_corpus(self):
+        tasks, comments = self.seed('--seed', '7')
+        self.assertEqual(len(tasks), 60)
+        self.assertTrue(comments)
+        self.assertEqual(self.seed('--seed', '7'), (tasks, comments))
+        self.assertNotEqual(self.seed('--seed', '8')[0], tasks)
+
+    def test_seeded_rows_are_consistent(self):
+        self.seed('--comments', '2', '--attachments', '1')
+        self.assertEqual(recount(apply=False), {'categories': 0, 'tasks': 0})
+        self.assertEqual(Category.objects.aggregate(total=Sum('task_count'))['total'], Task.objects.exclude(category=None).count())
+        title = Task.objects.first().title
+        self.assertEqual(self.client.get('/api/tasks/', {'search': title}).json()[0]['title'], title)
+
+
+class BenchmarkHarnessTests(TemporaryMediaRootMixin, TestCase):
+    def test_every_route_is_benchmarked(self):
+        self.assertEqual(benchmark.uncovered_routes(), [])
+
+    def test_run_and_compare_against_baseline(self):
+        results = benchmark.run_benchmarks([30], iterations=2, warmup=0)
+        routes = results['30']
+        self.assertEqual(set(routes), {route[0] for route in benchmark.ROUTES})
+        self.assertEqual(routes['task-list']['status'], [200])
+        self.assertEqual(routes['attachmentupload-complete']['status'], [201])
+        self.assertLessEqual(routes['task-statistics']['queries'], 1)
+        self.assertEqual(benchmark.compare(results, results), [])
+
+        slower = json.loads(json.dumps(results))
+        slower['30']['task-list']['queries'] += 1
+        slower['30']['category-list']['p50_ms'] = routes['category-list']['p50_ms'] * 2 + 10
+        slower['30']['home']['status'] = [500]
+        regressions = benchmark.compare(results, slower)
+        self.assertEqual(len(regressions), 3)
+        self.assertIn('[30 tasks] task-list: queries 3 -> 4', regressions)
+
+    def test_missing_baseline_is_a_command_error(self):
+        missing = os.path.join(self.media_root, 'missing.json')
+        with self.assertRaisesMessage(CommandError, f'Baseline {missing} does not exist'):
+            call_command('benchmark', baseline=missing, stdout=StringIO())
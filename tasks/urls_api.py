@@ -7,10 +7,15 @@ router.register(r'tasks', views.TaskViewSet)
 router.register(r'categories', views.CategoryViewSet)
 router.register(r'comments', views.CommentViewSet)
 router.register(r'attachments', views.AttachmentViewSet)
+router.register(r'attachment-uploads', views.AttachmentUploadViewSet)
+
+# The router's views by URL name, for the ASGI routes in tasks.urls_asgi
+drf_views = {url.name: url.callback for url in router.urls}
 
 urlpatterns = [
     path('', include(router.urls)),
     # Legacy endpoints (non-DRF) with potential bugs
     path('task/<int:task_id>/', views.task_detail, name='api_task_detail'),
     path('category/<int:category_id>/tasks/', views.category_tasks, name='api_category_tasks'),
+    path('cache/stats/', views.cache_stats, name='api_cache_stats'),
 ] 
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import views
+from .urls_api import drf_views
+
+# Native async views, routed only by the ASGI application (bugtracker.asgi).
+# They shadow the sync views in tasks.urls and tasks.urls_api, which WSGI
+# keeps serving without an event-loop hop.
+urlpatterns = [
+    path('', views.ahome, name='home'),
+]
+
+api_urlpatterns = [
+    # JSON reads are served natively; anything else falls through to the DRF viewset
+    path('tasks/', views.with_async_reads(drf_views['task-list'], views.task_read), name='task-list'),
+    path('tasks/<int:pk>/', views.with_async_reads(drf_views['task-detail'], views.task_read), name='task-detail'),
+    path('categories/', views.with_async_reads(drf_views['category-list'], views.category_read), name='category-list'),
+    path('categories/<int:pk>/', views.with_async_reads(drf_views['category-detail'], views.category_read), name='category-detail'),
+    path('task/<int:task_id>/', views.atask_detail, name='api_task_detail'),
+    path('category/<int:category_id>/tasks/', views.acategory_tasks, name='api_category_tasks'),
+]
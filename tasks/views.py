@@ -1,63 +1,174 @@
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
-from django.db.models import Q
-from django.utils import timezone
-from rest_framework import viewsets, status
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import Task, Category, Comment, Attachment
-from .serializers import TaskSerializer, CategorySerializer, CommentSerializer, AttachmentSerializer
+from rest_framework.settings import api_settings
+from .models import Task, Category, Comment, Attachment, AttachmentUpload
+from .serializers import (
+    TaskSerializer, CategorySerializer, CommentSerializer, AttachmentSerializer, AttachmentUploadSerializer,
+    TaskWriteSerializer,
+    parse_shape_params,
+)
+from .attachments import (
+    UploadOffsetMismatch, append_chunk, build_download_response, complete_upload, discard_upload,
+)
+from .bulk import bulk_apply_changes, bulk_create_tasks, bulk_delete_tasks, bulk_update_tasks
+from .cache import aget_or_compute, get_cache_stats, get_or_compute, get_timeout
+from .export import EXPORT_FORMATS, export_tasks
+from .filters import filter_tasks
+from .pagination import InvalidCursor, KeysetPaginator, TaskKeysetPagination, get_page_size, keyset_requested
+from .renderers import FastJsonResponse
+from .search import search_tasks
+from .services import PRIORITY_KEYS, get_single_category_statistics, get_task_statistics
 from django.contrib.auth.models import User
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 
+# Bulk endpoints stream their per-item results past this many items
+BULK_STREAM_THRESHOLD = 1000
+BULK_MAX_ITEMS = 10000
+
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    pagination_class = TaskKeysetPagination
     
     def get_queryset(self):
-        queryset = Task.objects.all()
+        # Prefetch only what the requested response shape will render
+        serializer = self.get_serializer()
+        queryset = serializer.setup_eager_loading(Task.objects.all(), serializer=serializer)
+        return filter_tasks(queryset, self.request.query_params)
+    
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve'):
+            kwargs.update(parse_shape_params(self.request.query_params))
+        return super().get_serializer(*args, **kwargs)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every matching task as NDJSON (default) or CSV (?export_format=csv)"""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'export_format': [f'Expected one of: {", ".join(sorted(EXPORT_FORMATS))}.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         
-        # Filter by title/description
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | Q(description__icontains=search)
+        queryset = filter_tasks(Task.objects.all(), request.query_params)
+        response = StreamingHttpResponse(
+            export_tasks(queryset, export_format), content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+    
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create, update or delete many tasks in one transaction.
+        
+        POST   [{task}, ...]
+        PATCH  [{"id": 1, ...changes}, ...] or {"ids": [...], "changes": {...}}
+        DELETE {"ids": [...]} or [id, ...]
+        """
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_delete,
+        }[request.method]
+        try:
+            results = handler(request.data)
+        except ValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        
+        if any(result['status'] in ('error', 'not_found') for result in results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif request.method == 'POST':
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        
+        if len(results) > BULK_STREAM_THRESHOLD:
+            return StreamingHttpResponse(
+                stream_json_results(results), status=response_status, content_type='application/json'
             )
+        return Response({'results': results}, status=response_status)
+    
+    def get_bulk_serializer(self, **kwargs):
+        return TaskWriteSerializer(many=True, max_length=BULK_MAX_ITEMS, **kwargs)
+    
+    def bulk_create(self, data):
+        valid, errors = self.get_bulk_serializer().partition(data)
+        results = [{'index': index, 'status': 'error', 'errors': detail} for index, detail in errors.items()]
+        results += [
+            {'index': index, 'status': 'created', 'id': task.pk}
+            for index, task in bulk_create_tasks(valid)
+        ]
+        return sorted(results, key=lambda result: result['index'])
+    
+    def bulk_update(self, data):
+        if isinstance(data, dict):
+            # Same changes for every id: a single queryset update()
+            task_ids = parse_ids(data.get('ids'))
+            serializer = TaskWriteSerializer(data=data.get('changes', {}), partial=True)
+            serializer.is_valid(raise_exception=True)
+            updated = bulk_apply_changes(task_ids, serializer.validated_data)
+            return [
+                {'index': index, 'status': 'updated' if task_id in updated else 'not_found', 'id': task_id}
+                for index, task_id in enumerate(task_ids)
+            ]
         
-        # Filter by category
-        category_id = self.request.query_params.get('category', None)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-            
-        # Filter by completion status
-        completed = self.request.query_params.get('completed', None)
-        if completed is not None:
-            completed = completed.lower() == 'true'
-            queryset = queryset.filter(completed=completed)
+        if not isinstance(data, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        items, results, seen = [], [], set()
+        for index, item in enumerate(data):
+            task_id = item.get('id') if isinstance(item, dict) else None
+            if not is_task_id(task_id):
+                results.append({'index': index, 'status': 'error', 'errors': {'id': ['A task id is required.']}})
+                continue
+            if task_id in seen:
+                results.append({
+                    'index': index, 'status': 'error', 'id': task_id,
+                    'errors': {'id': ['This task is already updated by an earlier item.']},
+                })
+                continue
+            seen.add(task_id)
+            items.append((index, task_id, {key: value for key, value in item.items() if key != 'id'}))
         
-        # Filter by priority
-        priority = self.request.query_params.get('priority', None)
-        if priority:
-            queryset = queryset.filter(priority=priority)
-            
-        # Filter by due date (upcoming tasks)
-        upcoming = self.request.query_params.get('upcoming', None)
-        if upcoming is not None:
-            queryset = queryset.filter(due_date__gte=timezone.now())
-            
-        # Filter by overdue
-        overdue = self.request.query_params.get('overdue', None)
-        if overdue is not None:
-            queryset = queryset.filter(due_date__lt=timezone.now(), completed=False)
-            
-        return queryset
+        valid, errors = self.get_bulk_serializer(partial=True).partition([item for _, _, item in items])
+        results += [
+            {'index': items[position][0], 'status': 'error', 'id': items[position][1], 'errors': detail}
+            for position, detail in errors.items()
+        ]
+        updated, missing = bulk_update_tasks(
+            [(items[position][0], items[position][1], validated) for position, validated in valid]
+        )
+        results += [{'index': index, 'status': 'updated', 'id': task.pk} for index, task in updated]
+        results += [{'index': index, 'status': 'not_found'} for index in missing]
+        return sorted(results, key=lambda result: result['index'])
+    
+    def bulk_delete(self, data):
+        task_ids = parse_ids(data.get('ids') if isinstance(data, dict) else data)
+        deleted = bulk_delete_tasks(task_ids)
+        return [
+            {'index': index, 'status': 'deleted' if task_id in deleted else 'not_found', 'id': task_id}
+            for index, task_id in enumerate(task_ids)
+        ]
     
     @action(detail=True, methods=['post'])
     def toggle_completed(self, request, pk=None):
-        task = self.get_object()
-        completed = task.toggle_completed()
+        try:
+            completed = Task.objects.toggle_completed(pk)
+        except (TypeError, ValueError):
+            completed = None
+        if completed is None:
+            raise Http404('No Task matches the given query.')
         return Response({'completed': completed})
     
     @action(detail=True, methods=['get'])
@@ -68,16 +179,34 @@ class TaskViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        task = self.get_object()
-        comment_count = task.comments.count()
-        avg_comment_length = sum(c.get_word_count() for c in task.comments.all()) / max(comment_count, 1)
+        # One aggregate query; never loads the task's comments
+        try:
+            stats = get_task_statistics([int(pk)])
+        except ValueError:
+            stats = {}
+        if not stats:
+            raise Http404('No Task matches the given query.')
+        return Response(stats[int(pk)])
+    
+    @action(detail=False, methods=['get', 'post'], url_path='statistics', url_name='batch-statistics')
+    def batch_statistics(self, request):
+        """
+        Statistics for many tasks in one round trip.
         
+        GET  ?ids=1,2,3
+        POST {"ids": [1, 2, 3]}
+        """
+        if request.method == 'GET':
+            try:
+                ids = [int(task_id) for task_id in request.query_params.get('ids', '').split(',') if task_id]
+            except ValueError:
+                raise ValidationError({'ids': ['Expected a comma-separated list of task ids.']})
+        else:
+            ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        stats = get_task_statistics(parse_ids(ids))
         return Response({
-            'comment_count': comment_count,
-            'attachment_count': task.attachments.count(),
-            'avg_comment_length': avg_comment_length,
-            'days_since_creation': (timezone.now() - task.created_at).days,
-            'completion_time': (task.updated_at - task.created_at).days if task.completed else None
+            'results': [{'id': task_id, **stats[task_id]} for task_id in dict.fromkeys(ids) if task_id in stats],
+            'not_found': [task_id for task_id in dict.fromkeys(ids) if task_id not in stats],
         })
         
     @action(detail=True, methods=['get'])
@@ -114,58 +243,80 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         return Response({'status': 'metadata added'})
 
+def is_task_id(value):
+    # bool is an int subclass; `true` must not mean task 1
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def parse_ids(ids):
+    if not isinstance(ids, list) or not all(is_task_id(task_id) for task_id in ids):
+        raise ValidationError({'ids': ['Expected a list of task ids.']})
+    if len(ids) > BULK_MAX_ITEMS:
+        raise ValidationError({'ids': [f'Ensure this batch has no more than {BULK_MAX_ITEMS} items.']})
+    return ids
+
+def stream_json_results(results):
+    yield '{"results": ['
+    for position, result in enumerate(results):
+        yield (',' if position else '') + json.dumps(result, cls=DjangoJSONEncoder)
+    yield ']}'
+
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(Category.objects.all())
+    
+    def cache_pk(self, pk):
+        """The id the cache keys and signal versions use; '01' and '1' are the same category"""
+        try:
+            return int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+    
     @action(detail=True, methods=['get'])
     def tasks(self, request, pk=None):
-        category = self.get_object()
-        tasks = Task.objects.filter(category=category)
-        serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data)
+        def build():
+            category = self.get_object()
+            tasks = TaskSerializer.setup_eager_loading(Task.objects.filter(category=category))
+            serializer = TaskSerializer(tasks, many=True)
+            return serializer.data
+        
+        pk = self.cache_pk(pk)
+        return Response(get_or_compute('category_tasks_api', [pk], [f'category:{pk}'], build))
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        category = self.get_object()
-        total_tasks = category.task_set.count()
-        completed_tasks = category.task_set.filter(completed=True).count()
-        
-        # Division by zero potential
-        completion_percentage = (completed_tasks / max(total_tasks, 1)) * 100
-        
-        # KeyError potential
-        priority_breakdown = {
-            'low': category.task_set.filter(priority=1).count(),
-            'medium': category.task_set.filter(priority=2).count(),
-            'high': category.task_set.filter(priority=3).count(),
-            'critical': category.task_set.filter(priority=4).count()
-        }
+        def build():
+            category = self.get_object()
+            stats = get_single_category_statistics(category)
+            return {
+                'total_tasks': stats['total'],
+                'completed_tasks': stats['completed'],
+                'completion_percentage': stats['completion_percentage'],
+                'priority_breakdown': stats['priority_breakdown']
+            }
         
-        return Response({
-            'total_tasks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'completion_percentage': completion_percentage,
-            'priority_breakdown': priority_breakdown
-        })
+        pk = self.cache_pk(pk)
+        return Response(get_or_compute('category_statistics', [pk], [f'category:{pk}'], build))
         
     @action(detail=True, methods=['get'])
     def task_breakdown(self, request, pk=None):
         """Get statistics about tasks by priority with a realistic KeyError bug"""
         category = self.get_object()
+        stats = get_single_category_statistics(category)
         
-        # Count tasks by priority
-        priority_counts = {}
-        for task in category.task_set.all():
-            priority_name = task.get_priority_display()
-            if priority_name in priority_counts:
-                priority_counts[priority_name] += 1
-            else:
-                priority_counts[priority_name] = 1
+        # Count tasks by priority, only keeping priorities that have tasks
+        priority_labels = dict(Task.PRIORITY_CHOICES)
+        priority_counts = {
+            priority_labels[priority]: stats['priority_breakdown'][key]
+            for priority, key in PRIORITY_KEYS.items()
+            if stats['priority_breakdown'][key]
+        }
         
         # Realistic bug: Accessing dict keys without checking if they exist
         result = {
-            'total': category.task_set.count(),
+            'total': stats['total'],
             'high_priority': priority_counts['High'],  # KeyError if no high priority tasks
             'medium_priority': priority_counts['Medium'],  # KeyError if no medium priority tasks
             'low_priority': priority_counts['Low']  # KeyError if no low priority tasks
@@ -177,6 +328,9 @@ class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(Comment.objects.all())
+    
     def perform_create(self, serializer):
         # Potential for error if user doesn't exist
         serializer.save(author_id=self.request.query_params.get('author_id', 1))
@@ -184,27 +338,125 @@ class CommentViewSet(viewsets.ModelViewSet):
 class AttachmentViewSet(viewsets.ModelViewSet):
     queryset = Attachment.objects.all()
     serializer_class = AttachmentSerializer
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download with HTTP Range support, or hand off to X-Sendfile/X-Accel-Redirect"""
+        return build_download_response(self.get_object(), request)
 
-# Legacy JSON views that might have bugs
-def task_detail(request, task_id):
-    task = get_object_or_404(Task, pk=task_id)
+class AttachmentUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                              mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads.
+    
+    POST   /api/attachment-uploads/                 start: {task, filename, total_size?}
+    PUT    /api/attachment-uploads/<id>/            raw chunk with Content-Range
+    GET    /api/attachment-uploads/<id>/            current offset, to resume
+    POST   /api/attachment-uploads/<id>/complete/   assemble into an Attachment
+    DELETE /api/attachment-uploads/<id>/            abort
+    """
+    queryset = AttachmentUpload.objects.all()
+    serializer_class = AttachmentUploadSerializer
+    
+    def update(self, request, *args, **kwargs):
+        upload = self.get_object()
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = -1
+        # Read the raw stream ourselves; request.data would buffer the chunk
+        try:
+            upload = append_chunk(upload, request.stream, request.headers.get('Content-Range'), content_length)
+        except UploadOffsetMismatch as exc:
+            return Response({'detail': str(exc), 'received': exc.received}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(upload).data)
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        attachment = complete_upload(self.get_object())
+        return Response(AttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
+    
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
+# Native async read paths, routed only by the ASGI entry point (see
+# tasks.urls_asgi); under WSGI every route keeps its sync view. DRF views are
+# sync-only, so JSON GETs are served here with the async ORM and every other
+# request is handed to the router's DRF view through a single sync_to_async hop.
+def wants_async_read(request):
+    return (
+        request.method == 'GET'
+        and 'format' not in request.GET
+        and 'text/html' not in request.headers.get('Accept', '')
+        and not keyset_requested(request.GET)
+    )
+
+def with_async_reads(drf_view, read):
+    drf_view = sync_to_async(drf_view)
+    
+    async def view(request, *args, **kwargs):
+        if wants_async_read(request):
+            return await read(request, *args, **kwargs)
+        return await drf_view(request, *args, **kwargs)
     
+    # DRF enforces CSRF itself for session-authenticated writes
+    view.csrf_exempt = True
+    return view
+
+def render_api_response(data, status_code=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status_code, content_type=renderer.media_type)
+
+async def aget_object_or_404(queryset, **lookup):
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+async def serialize_async(serializer_class, queryset, request, pk=None, **kwargs):
+    """
+    Fetch with the serializer's eager-loading plan (one thread hop for the
+    query and its prefetches) and render; serialization itself never queries.
+    """
+    context = {'request': request}
+    queryset = serializer_class.setup_eager_loading(
+        queryset, serializer=serializer_class(context=context, **kwargs)
+    )
+    if pk is None:
+        instances = [instance async for instance in queryset]
+        return render_api_response(serializer_class(instances, many=True, context=context, **kwargs).data)
+    try:
+        instance = await aget_object_or_404(queryset, pk=pk)
+    except Http404 as exc:
+        return render_api_response({'detail': str(exc)}, status.HTTP_404_NOT_FOUND)
+    return render_api_response(serializer_class(instance, context=context, **kwargs).data)
+
+async def task_read(request, pk=None):
+    return await serialize_async(
+        TaskSerializer, filter_tasks(Task.objects.all(), request.GET), request, pk,
+        **parse_shape_params(request.GET),
+    )
+
+async def category_read(request, pk=None):
+    return await serialize_async(CategorySerializer, Category.objects.all(), request, pk)
+
+# Legacy JSON views that might have bugs
+def task_detail_data(task):
     # This will trigger our original bug for tasks with no due date
     days_left = task.days_until_due()
     
-    return JsonResponse({
+    return {
         'id': task.id,
         'title': task.title,
         'description': task.description,
         'completed': task.completed,
         'days_until_due': days_left
-    })
+    }
 
-def category_tasks(request, category_id):
-    category = get_object_or_404(Category, pk=category_id)
+def category_tasks_data(category, category_tasks):
     tasks = []
     
-    for task in category.task_set.all():
+    for task in category_tasks:
         # This will also fail without timezone import
         is_overdue = task.is_overdue()
         
@@ -215,19 +467,66 @@ def category_tasks(request, category_id):
             'is_overdue': is_overdue
         })
     
-    return JsonResponse({
+    return {
         'category': category.name,
         'tasks': tasks
-    })
+    }
+
+def task_detail(request, task_id):
+    def build():
+        return task_detail_data(get_object_or_404(Task, pk=task_id))
+    
+    return FastJsonResponse(get_or_compute('task_detail', [task_id], [f'task:{task_id}'], build))
+
+def category_tasks(request, category_id):
+    def build():
+        category = get_object_or_404(Category, pk=category_id)
+        return category_tasks_data(category, category.task_set.all())
+    
+    return FastJsonResponse(get_or_compute('category_tasks', [category_id], [f'category:{category_id}'], build))
+
+async def atask_detail(request, task_id):
+    async def build():
+        return task_detail_data(await aget_object_or_404(Task.objects.all(), pk=task_id))
+    
+    return FastJsonResponse(await aget_or_compute('task_detail', [task_id], [f'task:{task_id}'], build))
+
+async def acategory_tasks(request, category_id):
+    async def build():
+        category = await aget_object_or_404(Category.objects.all(), pk=category_id)
+        return category_tasks_data(category, [task async for task in category.task_set.all()])
+    
+    return FastJsonResponse(await aget_or_compute('category_tasks', [category_id], [f'category:{category_id}'], build))
+
+def cache_stats(request):
+    return FastJsonResponse(get_cache_stats())
 
 # Simple views for templates
+def home_querysets():
+    # Only what home.html renders, so nothing is lazily loaded while rendering
+    upcoming_tasks = Task.objects.filter(completed=False).only('id', 'title', 'due_date', 'updated_at').order_by('due_date')[:5]
+    categories = Category.objects.only('id', 'name', 'task_count')
+    return upcoming_tasks, categories
+
 def home(request):
-    upcoming_tasks = Task.objects.filter(completed=False).order_by('due_date')[:5]
-    categories = Category.objects.all()
-    return render(request, 'home.html', {
-        'upcoming_tasks': upcoming_tasks,
-        'categories': categories,
-    })
+    def build():
+        upcoming_tasks, categories = home_querysets()
+        return {'upcoming_tasks': list(upcoming_tasks), 'categories': list(categories)}
+    
+    context = {**get_or_compute('home', [], ['home'], build), 'fragment_cache_timeout': get_timeout()}
+    return render(request, 'home.html', context)
+
+async def ahome(request):
+    async def build():
+        upcoming_tasks, categories = home_querysets()
+        return {
+            'upcoming_tasks': [task async for task in upcoming_tasks],
+            'categories': [category async for category in categories],
+        }
+    
+    context = {**await aget_or_compute('home', [], ['home'], build), 'fragment_cache_timeout': get_timeout()}
+    # Context processors (messages) may load the session from the database
+    return await sync_to_async(render)(request, 'home.html', context)
 
 class TaskListView(ListView):
     model = Task
@@ -236,7 +535,8 @@ class TaskListView(ListView):
     paginate_by = 10
     
     def get_queryset(self):
-        queryset = Task.objects.all()
+        # Each card shows its category, so join it rather than query per card
+        queryset = Task.objects.select_related('category')
         
         # Apply filters based on GET parameters
         search = self.request.GET.get('search')
@@ -244,7 +544,7 @@ class TaskListView(ListView):
         completed = self.request.GET.get('completed')
         
         if search:
-            queryset = queryset.filter(title__icontains=search)
+            queryset = search_tasks(queryset, search)
         if category:
             queryset = queryset.filter(category_id=category)
         if completed:
@@ -253,9 +553,42 @@ class TaskListView(ListView):
             
         return queryset
     
+    def paginate_queryset(self, queryset, page_size):
+        # Opt-in keyset mode: no OFFSET and no COUNT(*) per request
+        params = self.request.GET
+        if not keyset_requested(params):
+            return super().paginate_queryset(queryset, page_size)
+        
+        paginator = KeysetPaginator(
+            queryset,
+            get_page_size(params, page_size, 100),
+            ordering=params.get('ordering'),
+            count_limit=1000 if params.get('count') == 'approximate' else None,
+        )
+        try:
+            page = paginator.get_page(params.get('cursor'))
+        except InvalidCursor as exc:
+            raise Http404(str(exc))
+        return (None, page, page.object_list, page.has_next() or page.has_previous())
+    
+    def get_cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params.pop('pagination', None)
+        params['cursor'] = cursor
+        return '?' + params.urlencode()
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
+        context['categories'] = list(Category.objects.only('id', 'name'))
+        context['fragment_cache_timeout'] = get_timeout()
+        if keyset_requested(self.request.GET):
+            page = context['page_obj']
+            context['keyset_mode'] = True
+            context['keyset_page'] = page
+            context['next_page_url'] = self.get_cursor_url(page.next_cursor)
+            context['previous_page_url'] = self.get_cursor_url(page.previous_cursor)
         return context
 
 class TaskDetailView(DetailView):
@@ -316,9 +649,8 @@ class CategoryListView(ListView):
     context_object_name = 'categories'
 
 def task_toggle_completed(request, pk):
-    task = get_object_or_404(Task, pk=pk)
-    task.completed = not task.completed
-    task.save()
+    if Task.objects.toggle_completed(pk) is None:
+        raise Http404('No Task matches the given query.')
     return redirect('task_detail', pk=pk)
 
 def category_detail(request, pk):
@@ -0,0 +1,585 @@
+"""
+Tests for sentry_ai_fix_agent against a local fake Sentry server.
+
+Run with: python -m unittest test_sentry_ai_fix_agent
+The GitHub and Gemini SDKs are replaced with stubs; only `requests` is needed.
+"""
+import base64
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import requests  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("requests is not installed")
+
+# The agent imports the GitHub and Gemini SDKs at module level
+sys.modules['github'] = types.SimpleNamespace(Github=lambda *args, **kwargs: None)
+sys.modules['google'] = google = sys.modules.get('google') or types.ModuleType('google')
+google.generativeai = sys.modules['google.generativeai'] = types.SimpleNamespace(
+    configure=lambda **kwargs: None,
+    GenerativeModel=lambda *args, **kwargs: None,
+)
+
+import sentry_ai_fix_agent as agent  # noqa: E402
+
+agent.logger.setLevel(logging.CRITICAL)
+
+
+class Tracker:
+    """Counts calls and the peak number running at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = self.peak = self.calls = 0
+        self.threads = set()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+            self.threads.add(threading.current_thread().name)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.active -= 1
+
+
+def make_event(file_path, function, exception_type):
+    frame = {'filename': file_path, 'function': function, 'lineno': 10, 'in_app': True, 'context_line': 'boom()'}
+    return {'entries': [{'type': 'exception', 'data': {'values': [
+        {'type': exception_type, 'stacktrace': {'frames': [frame]}},
+    ]}}]}
+
+
+class FakeSentry:
+    """
+    Local stand-in for the Sentry API: pages through `issues` with Link
+    cursor headers, serves each issue's latest event and accepts comments
+    and tags. `script(path, responses)` queues canned responses for a path.
+    """
+
+    def __init__(self, issues=(), events=None, delay=0.0):
+        self.issues = list(issues)
+        self.events = events or {}
+        self.delay = delay
+        self.scripted = {}
+        self.log = []
+        # When each latest event was served
+        self.fetched = []
+        self.connections = set()
+        # Concurrency of the per-issue calls (events, comments, tags)
+        self.tracker = Tracker()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class())
+        # Pooled connections are dropped without ceremony when a client closes
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/0"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def script(self, path, responses):
+        self.scripted[path] = list(responses)
+
+    def config(self):
+        return {'SENTRY_URL': self.url, 'SENTRY_ORG': 'org', 'SENTRY_PROJECT': 'proj', 'SENTRY_TOKEN': 'token'}
+
+    def handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def respond(self, status, body=None, headers=None):
+                # A 204 carries no body, or the next response on the connection is garbled
+                data = b'' if status == 204 else json.dumps(body if body is not None else {}).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def handle_request(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                fake.log.append((self.command, url.path))
+                fake.connections.add(self.client_address)
+
+                if fake.scripted.get(url.path):
+                    return self.respond(*fake.scripted[url.path].pop(0))
+                if url.path.endswith('/issues/') and '/projects/' in url.path:
+                    return self.list_issues(url)
+
+                with fake.tracker:
+                    if fake.delay:
+                        time.sleep(fake.delay)
+                    match = re.search(r'/issues/([^/]+)/events/latest/$', url.path)
+                    if match:
+                        self.respond(200, fake.events[match.group(1)])
+                        fake.fetched.append(time.perf_counter())
+                        return
+                    if url.path.endswith('/comments/'):
+                        return self.respond(201, {'ok': True})
+                    if url.path.endswith('/tags/'):
+                        return self.respond(204)
+                self.respond(404)
+
+            def list_issues(self, url):
+                params = parse_qs(url.query)
+                offset = int(params.get('cursor', ['0'])[0])
+                limit = int(params.get('limit', ['100'])[0])
+                page = fake.issues[offset:offset + limit]
+                following = offset + limit
+                more = 'true' if following < len(fake.issues) else 'false'
+                link = f'<{fake.url}{url.path[len("/api/0"):]}?cursor={following}&limit={limit}>; rel="next"; results="{more}"; cursor="{following}"'
+                self.respond(200, page, {'Link': link})
+
+            do_GET = do_POST = handle_request
+
+        return Handler
+
+
+class StubGitHub:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.tracker = Tracker()
+        self.pull_requests = []
+
+    def get_file_content(self, file_path):
+        with self.tracker:
+            time.sleep(self.delay)
+            return f"# {file_path}\n", f"sha-{file_path}"
+
+    def create_pull_request(self, file_path, content_sha, fixed_code, issue_details, explanation):
+        with self.tracker:
+            time.sleep(self.delay)
+            issues = issue_details if isinstance(issue_details, list) else [issue_details]
+            self.pull_requests.append((file_path, sorted(issue['id'] for issue in issues)))
+            return f"https://github.test/pull/{len(self.pull_requests)}"
+
+
+class StubGemini:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.tracker = Tracker()
+        self.started = []
+
+    def generate(self):
+        self.started.append(time.perf_counter())
+        with self.tracker:
+            time.sleep(self.delay)
+            return {"explanation": "fixed", "fixed_code": "pass\n"}
+
+    def generate_fix(self, error_message, file_content, context_info):
+        return self.generate()
+
+    def generate_group_fix(self, file_path, file_content, clusters):
+        return self.generate()
+
+
+def make_issues(count, same_file=False):
+    issues = [{'id': str(n), 'title': f"Error {n}", 'permalink': f"https://sentry.test/{n}"} for n in range(count)]
+    events = {
+        issue['id']: make_event('tasks/models.py' if same_file else f"tasks/module_{issue['id']}.py", 'run', 'KeyError')
+        for issue in issues
+    }
+    return issues, events
+
+
+def make_checkpoint(test, path=None):
+    if path is None:
+        path = tempfile.mktemp(suffix='.sqlite3')
+        test.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+    checkpoint = agent.CheckpointStore(path)
+    test.addCleanup(checkpoint.close)
+    return checkpoint
+
+
+class PipelineConcurrencyTests(unittest.TestCase):
+    def start_sentry(self, count, delay=0.01, **kwargs):
+        issues, events = make_issues(count, **kwargs)
+        fake = FakeSentry(issues, events, delay=delay)
+        self.addCleanup(fake.stop)
+        client = agent.SentryClient(fake.config(), backoff=0.01)
+        self.addCleanup(client.close)
+        return fake, client
+
+    def test_single_worker_is_sequential(self):
+        fake, sentry = self.start_sentry(6)
+        github, gemini = StubGitHub(), StubGemini(delay=0.01)
+        result = agent.run_pipeline(sentry.iter_issues(), sentry, github, gemini, workers=1)
+        self.assertEqual(result, (6, 6))
+        self.assertEqual((fake.tracker.peak, github.tracker.peak, gemini.tracker.peak), (1, 1, 1))
+        self.assertEqual(len(github.tracker.threads | gemini.tracker.threads), 1)
+
+    def test_workers_respect_per_service_caps(self):
+        fake, sentry = self.start_sentry(24)
+        github, gemini = StubGitHub(delay=0.01), StubGemini(delay=0.05)
+        limits = agent.ServiceLimits(sentry=2, github=1, gemini=3)
+        result = agent.run_pipeline(sentry.iter_issues(), sentry, github, gemini, workers=8, limits=limits)
+        self.assertEqual(result, (24, 24))
+        self.assertLessEqual(fake.tracker.peak, 2)
+        self.assertLessEqual(github.tracker.peak, 1)
+        # Every issue is in its own file, so generations run side by side
+        self.assertGreater(gemini.tracker.peak, 1)
+        self.assertLessEqual(gemini.tracker.peak, 3)
+        self.assertEqual(len(github.pull_requests), 24)
+
+    def test_workers_bound_the_issues_in_flight(self):
+        fake, sentry = self.start_sentry(12)
+        github, gemini = StubGitHub(), StubGemini(delay=0.02)
+        limits = agent.ServiceLimits(sentry=10, github=10, gemini=10)
+        agent.run_pipeline(sentry.iter_issues(), sentry, github, gemini, workers=2, limits=limits)
+        self.assertLessEqual(fake.tracker.peak, 2)
+        self.assertLessEqual(gemini.tracker.peak, 2)
+        self.assertLessEqual(len(github.tracker.threads | gemini.tracker.threads), 2)
+
+    def test_issues_in_one_file_share_a_pull_request(self):
+        fake, sentry = self.start_sentry(5, same_file=True)
+        github, gemini = StubGitHub(), StubGemini()
+        result = agent.run_pipeline(sentry.iter_issues(), sentry, github, gemini, workers=4)
+        self.assertEqual(result, (5, 5))
+        self.assertEqual(github.pull_requests, [('tasks/models.py', ['0', '1', '2', '3', '4'])])
+        self.assertEqual(gemini.tracker.calls, 1)
+
+    def test_generation_overlaps_later_fetches(self):
+        fake, sentry = self.start_sentry(12, delay=0.05)
+        gemini = StubGemini(delay=0.02)
+        result = agent.run_pipeline(sentry.iter_issues(), sentry, StubGitHub(), gemini, workers=2, batch_size=2)
+        self.assertEqual(result, (12, 12))
+        # Fixes for the first batches start while later events are still being fetched
+        self.assertLess(min(gemini.started), max(fake.fetched))
+
+    def test_failed_reporting_keeps_the_pull_request(self):
+        fake, sentry = self.start_sentry(3, same_file=True)
+        fake.script('/api/0/issues/0/comments/', [(500, {})])
+        fake.script('/api/0/issues/1/tags/', [(400, {})])
+        checkpoint = make_checkpoint(self)
+        github = StubGitHub()
+        result = agent.run_pipeline(sentry.iter_issues(), sentry, github, StubGemini(), checkpoint=checkpoint)
+        self.assertEqual(result, (3, 3))
+        self.assertEqual(len(github.pull_requests), 1)
+        self.assertTrue(all(checkpoint.is_done(str(n)) for n in range(3)))
+        # The other issues are still reported after the first failure
+        posted = {path for method, path in fake.log if method == 'POST'}
+        self.assertEqual(posted, {f"/api/0/issues/{n}/{kind}/" for n in range(3) for kind in ('comments', 'tags')})
+
+    def test_limit_does_not_count_skipped_issues(self):
+        fake, sentry = self.start_sentry(6)
+        checkpoint = make_checkpoint(self)
+        # Done issues Sentry still returns, e.g. because tagging them failed
+        checkpoint.record('0', True)
+        checkpoint.record('1', True)
+        github = StubGitHub()
+        result = agent.run_pipeline(sentry.iter_issues(), sentry, github, StubGemini(),
+                                    checkpoint=checkpoint, limit=2)
+        self.assertEqual(result, (2, 2))
+        self.assertEqual(sorted(ids for _, ids in github.pull_requests), [['2'], ['3']])
+
+    def test_command_line_sets_workers_and_limits(self):
+        fake, _ = self.start_sentry(0)
+        state = tempfile.mktemp(suffix='.sqlite3')
+        self.addCleanup(lambda: os.path.exists(state) and os.remove(state))
+        environment = {**fake.config(), 'GITHUB_TOKEN': 't', 'GITHUB_REPO': 'org/repo', 'GEMINI_API_KEY': 'k'}
+        argv = ['agent', '--workers', '3', '--sentry-concurrency', '5', '--github-concurrency', '1',
+                '--gemini-concurrency', '2', '--batch-size', '7', '--limit', '4', '--state', state]
+        with mock.patch.dict(os.environ, environment), mock.patch.object(sys, 'argv', argv), \
+                mock.patch.object(agent, 'run_pipeline', return_value=(0, 0)) as run_pipeline:
+            self.assertEqual(agent.main(), 0)
+        kwargs = run_pipeline.call_args.kwargs
+        self.assertEqual((kwargs['workers'], kwargs['batch_size'], kwargs['limit']), (3, 7, 4))
+        capacity = {name: semaphore._value for name, semaphore in kwargs['limits'].semaphores.items()}
+        self.assertEqual(capacity, {'sentry': 5, 'github': 1, 'gemini': 2})
+
+
+class IssuePagingTests(unittest.TestCase):
+    def setUp(self):
+        issues, events = make_issues(7)
+        self.fake = FakeSentry(issues, events)
+        self.addCleanup(self.fake.stop)
+        self.client = agent.SentryClient(self.fake.config())
+        self.addCleanup(self.client.close)
+        self.list_path = '/api/0/projects/org/proj/issues/'
+
+    def pages_fetched(self):
+        return len([entry for entry in self.fake.log if entry[1] == self.list_path])
+
+    def test_follows_link_cursors_across_pages(self):
+        issues = list(self.client.iter_issues(page_size=3))
+        self.assertEqual([issue['id'] for issue in issues], [str(n) for n in range(7)])
+        self.assertEqual(self.pages_fetched(), 3)
+
+    def test_limit_stops_paging(self):
+        issues = list(self.client.iter_issues(limit=4, page_size=3))
+        self.assertEqual(len(issues), 4)
+        self.assertEqual(self.pages_fetched(), 2)
+
+    def test_sequential_requests_share_one_connection(self):
+        for issue in self.client.iter_issues(page_size=3):
+            self.client.get_issue_details(issue['id'])
+        self.client.add_comment('0', 'fixed')
+        self.assertEqual(len(self.fake.log), 3 + 7 + 1)
+        self.assertEqual(len(self.fake.connections), 1)
+
+    def test_pipeline_pulls_pages_as_it_goes(self):
+        result = agent.run_pipeline(self.client.iter_issues(page_size=3), self.client, StubGitHub(), StubGemini(),
+                                    workers=1, limit=2)
+        self.assertEqual(result, (2, 2))
+        self.assertEqual(self.pages_fetched(), 1)
+
+
+class CheckpointTests(unittest.TestCase):
+    def test_records_outcomes_and_the_watermark(self):
+        checkpoint = make_checkpoint(self)
+        checkpoint.record('1', False)
+        self.assertFalse(checkpoint.is_done('1'))
+        checkpoint.record('1', True)
+        self.assertTrue(checkpoint.is_done('1'))
+        self.assertFalse(checkpoint.is_done('2'))
+        self.assertEqual(checkpoint.connection.execute("SELECT attempts FROM issues").fetchone(), (2,))
+
+        started = agent.datetime(2026, 1, 2, 3, 4, 5)
+        checkpoint.save_last_run_time(started)
+        self.assertEqual(checkpoint.get_last_run_time(), started)
+
+    def test_resumes_after_a_crash(self):
+        issues, events = make_issues(6)
+        fake = FakeSentry(issues, events)
+        self.addCleanup(fake.stop)
+        sentry = agent.SentryClient(fake.config())
+        self.addCleanup(sentry.close)
+        # Issue 1 has no event to fix from, and the run dies after four issues
+        fake.script('/api/0/issues/1/events/latest/', [(404, {})])
+
+        def crash_after(stream, count):
+            for n, issue in enumerate(stream):
+                if n == count:
+                    raise RuntimeError('killed')
+                yield issue
+
+        path = tempfile.mktemp(suffix='.sqlite3')
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        checkpoint = agent.CheckpointStore(path)
+        with self.assertRaises(RuntimeError):
+            agent.run_pipeline(crash_after(sentry.iter_issues(page_size=2), 4), sentry, StubGitHub(), StubGemini(),
+                               workers=1, checkpoint=checkpoint, batch_size=1)
+        checkpoint.close()
+
+        checkpoint = make_checkpoint(self, path)
+        done = {str(n) for n in range(6) if checkpoint.is_done(str(n))}
+        self.assertIn('0', done)
+        self.assertNotIn('1', done)
+        self.assertEqual(checkpoint.connection.execute(
+            "SELECT status FROM issues WHERE issue_id = '1'").fetchone(), ('failed',))
+        github = StubGitHub()
+        result = agent.run_pipeline(sentry.iter_issues(page_size=2), sentry, github, StubGemini(),
+                                    checkpoint=checkpoint)
+        # The failed issue is retried along with the ones never finished
+        expected = {str(n) for n in range(6)} - done
+        self.assertEqual(result, (len(expected), len(expected)))
+        self.assertEqual({ids[0] for _, ids in github.pull_requests}, expected)
+        self.assertTrue(all(checkpoint.is_done(str(n)) for n in range(6)))
+
+
+class FakeRepository:
+    """The slice of PyGithub's Repository the snapshot and blob lookups use, counting calls"""
+
+    def __init__(self, files, truncated=False):
+        self.files = {path: content.encode() for path, content in files.items()}
+        self.truncated = truncated
+        self.default_branch = 'main'
+        self.calls = {}
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def get_branch(self, name):
+        self.count('get_branch')
+        return types.SimpleNamespace(commit=types.SimpleNamespace(sha='c0ffee' * 6 + 'c0ff'))
+
+    def get_git_tree(self, sha, recursive=False):
+        self.count('get_git_tree')
+        # A truncated tree leaves some files out
+        listed = list(self.files)[:1] if self.truncated else list(self.files)
+        elements = [
+            types.SimpleNamespace(path=path, sha=agent.git_blob_sha(self.files[path]), type='blob') for path in listed
+        ]
+        elements.append(types.SimpleNamespace(path='tasks', sha='0' * 40, type='tree'))
+        return types.SimpleNamespace(tree=elements, raw_data={'truncated': self.truncated})
+
+    def get_git_blob(self, sha):
+        self.count('get_git_blob')
+        [data] = [data for data in self.files.values() if agent.git_blob_sha(data) == sha]
+        return types.SimpleNamespace(content=base64.b64encode(data).decode())
+
+    def get_contents(self, path, ref=None):
+        self.count('get_contents')
+        self.contents_ref = ref
+        data = self.files[path]
+        return types.SimpleNamespace(content=base64.b64encode(data).decode(), sha=agent.git_blob_sha(data))
+
+
+class GitHubBlobCacheTests(unittest.TestCase):
+    files = {'tasks/models.py': 'class Task:\n    pass\n', 'tasks/views.py': 'def home():\n    pass\n'}
+
+    def setUp(self):
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        self.config = {'GITHUB_TOKEN': 't', 'GITHUB_REPO': 'org/repo', 'GITHUB_CACHE_DIR': cache.name}
+
+    def make_client(self, repository):
+        github = types.SimpleNamespace(get_repo=lambda name: repository)
+        with mock.patch.object(agent, 'Github', return_value=github):
+            return agent.GitHubClient(self.config)
+
+    def test_warm_cache_fetches_no_blobs(self):
+        cold_repository = FakeRepository(self.files)
+        cold = self.make_client(cold_repository)
+        for path, content in self.files.items():
+            self.assertEqual(cold.get_file_content(path), (content, agent.git_blob_sha(content.encode())))
+        cold.get_file_content('tasks/models.py')
+        # The repo, its branch and tree, and each blob once
+        self.assertEqual(cold.api_calls, 5)
+        self.assertEqual(cold_repository.calls['get_git_blob'], 2)
+
+        warm_repository = FakeRepository(self.files)
+        warm = self.make_client(warm_repository)
+        for path, content in self.files.items():
+            self.assertEqual(warm.get_file_content(path)[0], content)
+        self.assertEqual(warm.api_calls, 3)
+        self.assertNotIn('get_git_blob', warm_repository.calls)
+
+    def test_corrupt_cached_blob_is_fetched_again(self):
+        content = self.files['tasks/models.py'].encode()
+        sha = agent.git_blob_sha(content)
+        cache = agent.BlobCache(self.config['GITHUB_CACHE_DIR'])
+        for stored in (b'class Task:\n    pa', self.files['tasks/views.py'].encode()):
+            with self.subTest(stored=stored):
+                cache.put(sha, stored)
+                self.assertIsNone(cache.get(sha))
+                repository = FakeRepository(self.files)
+                client = self.make_client(repository)
+                self.assertEqual(client.get_file_content('tasks/models.py')[0], content.decode())
+                self.assertEqual(repository.calls['get_git_blob'], 1)
+                # The refetched blob replaces the bad one
+                self.assertEqual(cache.get(sha), content)
+
+    def test_truncated_tree_falls_back_to_contents(self):
+        repository = FakeRepository(self.files, truncated=True)
+        client = self.make_client(repository)
+        content, sha = client.get_file_content('tasks/views.py')
+        self.assertEqual(content, self.files['tasks/views.py'])
+        self.assertEqual(sha, agent.git_blob_sha(content.encode()))
+        self.assertEqual(repository.calls['get_contents'], 1)
+        # Read from the snapshot commit so the PR's update matches the branch
+        self.assertEqual(repository.contents_ref, client.get_snapshot()['commit'])
+
+        complete = FakeRepository(self.files)
+        client = self.make_client(complete)
+        self.assertEqual(client.get_file_content('tasks/missing.py'), (None, None))
+        self.assertNotIn('get_contents', complete.calls)
+
+
+class SentryClientRetryTests(unittest.TestCase):
+    def setUp(self):
+        issues, events = make_issues(1)
+        self.fake = FakeSentry(issues, events)
+        self.addCleanup(self.fake.stop)
+        self.client = agent.SentryClient(self.fake.config(), backoff=0.5, max_backoff=60)
+        self.addCleanup(self.client.close)
+        self.event_path = '/api/0/issues/0/events/latest/'
+        self.comment_path = '/api/0/issues/0/comments/'
+        # Sleeps are recorded instead of taken
+        patcher = mock.patch.object(agent.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sleeps(self):
+        return [call.args[0] for call in self.sleep.call_args_list]
+
+    def requests_to(self, path):
+        return [entry for entry in self.fake.log if entry[1] == path]
+
+    def test_429_waits_for_retry_after_seconds(self):
+        self.fake.script(self.event_path, [(429, {}, {'Retry-After': '7'})])
+        self.assertIn('entries', self.client.get_issue_details('0'))
+        self.assertEqual(self.sleeps(), [7.0])
+        self.assertEqual(len(self.requests_to(self.event_path)), 2)
+
+    def test_429_waits_for_retry_after_date(self):
+        self.fake.script(self.event_path, [(429, {}, {'Retry-After': formatdate(time.time() + 30, usegmt=True)})])
+        self.client.get_issue_details('0')
+        [delay] = self.sleeps()
+        self.assertAlmostEqual(delay, 30, delta=2)
+
+    def test_retry_after_is_capped(self):
+        self.fake.script(self.event_path, [(429, {}, {'Retry-After': '3600'})])
+        self.client.get_issue_details('0')
+        self.assertEqual(self.sleeps(), [60])
+
+    def test_503_is_retried_for_posts(self):
+        self.fake.script(self.comment_path, [(503, {}), (503, {})])
+        self.assertEqual(self.client.add_comment('0', 'fixed'), {'ok': True})
+        self.assertEqual(len(self.requests_to(self.comment_path)), 3)
+        self.assertEqual(self.client.metrics.summary()['add_comment']['retries'], 2)
+
+    def test_500_is_retried_for_reads_only(self):
+        self.fake.script(self.event_path, [(500, {})])
+        self.client.get_issue_details('0')
+        self.assertEqual(len(self.requests_to(self.event_path)), 2)
+
+        self.fake.script(self.comment_path, [(500, {})])
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.add_comment('0', 'fixed')
+        self.assertEqual(len(self.requests_to(self.comment_path)), 1)
+
+    def test_exhausted_rate_limit_waits_for_reset(self):
+        headers = {'X-Sentry-Rate-Limit-Remaining': '0', 'X-Sentry-Rate-Limit-Reset': str(time.time() + 20)}
+        self.fake.script(self.event_path, [(429, {}, headers)])
+        self.client.get_issue_details('0')
+        # The retry waits for the reset, and so does every later request
+        self.assertTrue(self.sleeps())
+        for delay in self.sleeps():
+            self.assertAlmostEqual(delay, 20, delta=2)
+        self.assertGreater(self.client.not_before, time.time())
+
+    def test_malformed_headers_fall_back_to_backoff(self):
+        malformed = [
+            {'Retry-After': 'soon'},
+            {'Retry-After': 'nan'},
+            {'Retry-After': 'Wed, 99 Foo 2024'},
+            {'X-Sentry-Rate-Limit-Remaining': '0', 'X-Sentry-Rate-Limit-Reset': 'later'},
+        ]
+        for headers in malformed:
+            with self.subTest(headers=headers):
+                self.sleep.reset_mock()
+                self.fake.script(self.event_path, [(429, {}, headers)])
+                self.assertIn('entries', self.client.get_issue_details('0'))
+                [delay] = self.sleeps()
+                self.assertTrue(0 <= delay <= self.client.backoff)
+
+
+if __name__ == '__main__':
+    unittest.main()